@@ -1,20 +1,30 @@
 from __future__ import annotations
 
+import json
+import random
+import struct
+import sys
+from array import array
 from datetime import datetime, timedelta
 from math import sqrt
 from typing import Any
 
-from flask import Blueprint, jsonify, render_template, request
-from sqlalchemy import func, or_
+from flask import Blueprint, abort, current_app, g, jsonify, render_template, request
+from sqlalchemy import Integer, cast, func, or_
+
+from analytics.cache import ResponseCache, current_generation
+from config import ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL, ANALYTICS_SCATTER_MAX_POINTS
 
 from models import (
     Athlete,
+    AthleteDayStats,
     Image,
     Jacket,
     Rifle,
     Scope,
     Session,
     Shot,
+    ShotHeatStats,
     Series,
     CompetitionAthlete,
     db,
@@ -23,6 +33,8 @@ from models import (
 
 analytics_bp = Blueprint("analytics", __name__, template_folder="templates", static_folder="static")
 
+response_cache = ResponseCache(ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL)
+
 
 def _parse_csv_ints(value: str | None) -> list[int]:
     if not value:
@@ -60,35 +72,34 @@ def _parse_date(value: str | None) -> datetime | None:
         return None
 
 
-def _stddev(values: list[float]) -> float:
-    if len(values) < 2:
+def _stddev_from_sums(count: int, total: int, sq_total: int) -> float:
+    """Population standard deviation from count, sum and sum of squares of integer scores."""
+    if count < 2:
         return 0.0
-    mean = sum(values) / len(values)
-    var = sum((v - mean) ** 2 for v in values) / len(values)
-    return sqrt(var)
+    # Exact in integers, so no cancellation error before the division
+    return sqrt(max(count * sq_total - total * total, 0)) / count
 
 
-def _slope(points: list[tuple[float, float]]) -> float:
-    if len(points) < 2:
-        return 0.0
-    xs = [p[0] for p in points]
-    ys = [p[1] for p in points]
-    mean_x = sum(xs) / len(xs)
-    mean_y = sum(ys) / len(ys)
-    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
-    den = sum((x - mean_x) ** 2 for x in xs)
-    if den == 0:
-        return 0.0
-    return num / den
+# julianday() of 1970-01-01, so slopes are per day like the millisecond timestamps of the charts
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
 
 
 def _score_expr():
     return func.coalesce(Shot.final_score, Shot.auto_score, 0)
 
 
-def _apply_filters(query, filters: dict[str, Any]):
+def _apply_filters(query, filters: dict[str, Any], created_col=None, athlete_col=None, mode_col=None):
+    """Apply the dashboard filters; the column arguments retarget them at a rollup table."""
+    created_col = created_col if created_col is not None else Image.created_at
+    athlete_col = athlete_col if athlete_col is not None else Image.athlete_id
+    mode_col = mode_col if mode_col is not None else Session.mode
+
     start = filters.get("start")
     end = filters.get("end")
+    if isinstance(created_col.type, db.Date):
+        # Rollup tables are bucketed by day; compare against plain dates
+        start = start.date() if start else None
+        end = end.date() if end else None
     athlete_ids = filters.get("athlete_ids") or []
     team_names = filters.get("teams") or []
     rifle_ids = filters.get("rifle_ids") or []
@@ -98,17 +109,17 @@ def _apply_filters(query, filters: dict[str, Any]):
     include_unassigned = filters.get("include_unassigned", False)
 
     if start:
-        query = query.filter(Image.created_at >= start)
+        query = query.filter(created_col >= start)
     if end:
-        query = query.filter(Image.created_at < end)
+        query = query.filter(created_col < end)
     if modes:
-        query = query.filter(Session.mode.in_(modes))
+        query = query.filter(mode_col.in_(modes))
 
     if athlete_ids:
         if include_unassigned:
-            query = query.filter(or_(Image.athlete_id.in_(athlete_ids), Image.athlete_id.is_(None)))
+            query = query.filter(or_(athlete_col.in_(athlete_ids), athlete_col.is_(None)))
         else:
-            query = query.filter(Image.athlete_id.in_(athlete_ids))
+            query = query.filter(athlete_col.in_(athlete_ids))
 
     if team_names:
         team_filter = Athlete.team.in_(team_names)
@@ -183,25 +194,140 @@ def filters():
     )
 
 
-@analytics_bp.route("/data")
-def data():
+# Response encodings: row objects (default), parallel arrays, or packed typed arrays (time_series only)
+RESPONSE_FORMATS = ("json", "columnar", "binary")
+
+
+def _parse_filters(args) -> dict[str, Any]:
+    """Filter dict from query args; list filters are sorted and de-duplicated so equal sets compare equal."""
     filters = {
-        "start": _parse_date(request.args.get("start")),
-        "end": _parse_date(request.args.get("end")),
-        "athlete_ids": _parse_csv_ints(request.args.get("athlete_ids")),
-        "teams": _parse_csv_strings(request.args.get("teams")),
-        "rifle_ids": _parse_csv_ints(request.args.get("rifle_ids")),
-        "jacket_ids": _parse_csv_ints(request.args.get("jacket_ids")),
-        "scope_ids": _parse_csv_ints(request.args.get("scope_ids")),
-        "modes": _parse_csv_strings(request.args.get("modes")),
-        "include_unassigned": _parse_bool(request.args.get("include_unassigned")),
+        "start": _parse_date(args.get("start")),
+        "end": _parse_date(args.get("end")),
+        "athlete_ids": sorted(set(_parse_csv_ints(args.get("athlete_ids")))),
+        "teams": sorted(set(_parse_csv_strings(args.get("teams")))),
+        "rifle_ids": sorted(set(_parse_csv_ints(args.get("rifle_ids")))),
+        "jacket_ids": sorted(set(_parse_csv_ints(args.get("jacket_ids")))),
+        "scope_ids": sorted(set(_parse_csv_ints(args.get("scope_ids")))),
+        "modes": sorted(set(_parse_csv_strings(args.get("modes")))),
+        "include_unassigned": _parse_bool(args.get("include_unassigned")),
+        # Not row filters: response encoding and how the shot scatter is reduced
+        "format": args.get("format") if args.get("format") in RESPONSE_FORMATS else "json",
+        "scatter": _parse_scatter_options(args),
     }
 
     if filters["end"]:
         filters["end"] = filters["end"] + timedelta(days=1)
 
-    score_expr = _score_expr()
+    return filters
+
+
+def _parse_scatter_options(args) -> dict[str, Any]:
+    try:
+        max_points = max(int(args.get("max_points", ANALYTICS_SCATTER_MAX_POINTS)), 0)
+    except ValueError:
+        max_points = ANALYTICS_SCATTER_MAX_POINTS
+    sample = args.get("sample", "reservoir")
+    return {
+        "sample": sample if sample in ("reservoir", "grid") else "reservoir",
+        "max_points": max_points,
+    }
+
+
+def _filters_key(filters: dict[str, Any]) -> str:
+    return json.dumps(filters, sort_keys=True, default=str)
+
+
+def _filters_echo(filters: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "start": filters["start"].strftime("%Y-%m-%d") if filters["start"] else None,
+        "end": (filters["end"] - timedelta(days=1)).strftime("%Y-%m-%d") if filters["end"] else None,
+        "athlete_ids": filters["athlete_ids"],
+        "teams": filters["teams"],
+        "rifle_ids": filters["rifle_ids"],
+        "jacket_ids": filters["jacket_ids"],
+        "scope_ids": filters["scope_ids"],
+        "modes": filters["modes"],
+        "include_unassigned": filters["include_unassigned"],
+    }
+
+
+def _cached_json(key: str, build):
+    """
+    Response for `key` from the response cache (building it on a miss) with ETag revalidation.
+    `build` returns a JSON-serializable value, or bytes for format=binary.
+    """
+    # Read the generation before computing: a write that lands meanwhile makes this entry stale at once
+    generation = current_generation()
+    entry = response_cache.get(key, generation)
+    if entry is None:
+        payload = build()
+        if isinstance(payload, bytes):
+            entry = response_cache.put(key, generation, payload, "application/octet-stream")
+        else:
+            entry = response_cache.put(key, generation, jsonify(payload).get_data(), "application/json")
+
+    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    # Let browsers keep the body but revalidate it every time (answered with 304 when unchanged)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
 
+@analytics_bp.route("/data")
+def data():
+    filters = _parse_filters(request.args)
+    if filters["format"] == "binary":
+        return jsonify({"error": "format=binary is only available for /data/time_series"}), 400
+    return _cached_json(_filters_key(filters), lambda: _build_data(filters))
+
+
+@analytics_bp.route("/data/<section>")
+def data_section(section: str):
+    build = SECTIONS.get(section)
+    if build is None:
+        abort(404)
+    filters = _parse_filters(request.args)
+    if filters["format"] == "binary" and section not in BINARY_SECTIONS:
+        return jsonify({"error": f"format=binary is not available for {section}"}), 400
+    return _cached_json(f"{section}:{_filters_key(filters)}", lambda: build(filters))
+
+
+def _build_data(filters: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "filters": _filters_echo(filters),
+        "summary": _summary(filters),
+        "training_vs_competition": _training_vs_competition(filters),
+        "time_series": _time_series(filters),
+        "comparison": _comparison(filters),
+        "team": _team(filters),
+        "distribution": {
+            "scatter": _scatter(filters),
+            "heatmap": _heatmap(filters),
+        },
+        "series_analysis": _series_analysis(filters),
+        "consistency": _consistency(filters),
+        "sparklines": _sparklines(filters),
+    }
+
+
+# ------------------------------------------------------------------
+# Base queries, computed at most once per request and filter set
+# ------------------------------------------------------------------
+
+
+def _memo(name: str, filters: dict[str, Any], build):
+    memo = g.setdefault("analytics_memo", {})
+    key = (name, _filters_key(filters))
+    if key not in memo:
+        memo[key] = build(filters)
+    return memo[key]
+
+
+def _attempts(filters: dict[str, Any]) -> list[dict[str, Any]]:
+    return _memo("attempts", filters, _load_attempts)
+
+
+def _load_attempts(filters: dict[str, Any]) -> list[dict[str, Any]]:
     attempts_q = (
         db.session.query(
             Image.id.label("image_id"),
@@ -216,21 +342,19 @@ def data():
             Athlete.rifle_id.label("rifle_id"),
             Athlete.jacket_id.label("jacket_id"),
             Rifle.scope_id.label("scope_id"),
-            func.sum(score_expr).label("total_score"),
-            func.count(Shot.id).label("shots_count"),
+            Image.cached_total_score.label("total_score"),
+            Image.cached_shots_count.label("shots_count"),
         )
         .join(Session, Image.session_id == Session.id)
         .outerjoin(Athlete, Image.athlete_id == Athlete.id)
         .outerjoin(Rifle, Athlete.rifle_id == Rifle.id)
-        .outerjoin(Shot, Shot.image_id == Image.id)
-        .group_by(Image.id)
+        .order_by(Image.id)
     )
 
     attempts_q = _apply_filters(attempts_q, filters)
-    attempts_rows = attempts_q.all()
 
     attempts = []
-    for row in attempts_rows:
+    for row in attempts_q.all():
         name = None
         if row.first_name:
             name = f"{row.first_name} {row.last_name or ''}".strip()
@@ -251,32 +375,161 @@ def data():
                 "shots_count": int(row.shots_count or 0),
             }
         )
+    return attempts
 
-    scores = [a["total_score"] for a in attempts if a["total_score"] is not None]
-    shots_total = sum(a["shots_count"] for a in attempts)
-    avg_score = sum(scores) / len(scores) if scores else 0.0
-    min_score = min(scores) if scores else 0.0
-    max_score = max(scores) if scores else 0.0
-    std_score = _stddev(scores) if scores else 0.0
-    avg_shot_score = (sum(scores) / shots_total) if shots_total else 0.0
 
-    training_scores = [a["total_score"] for a in attempts if a["mode"] == "training"]
-    competition_scores = [a["total_score"] for a in attempts if a["mode"] == "competition"]
-    standard_scores = [a["total_score"] for a in attempts if a["mode"] == "standard"]
+def _athlete_stats(filters: dict[str, Any]) -> dict[str, Any]:
+    return _memo("athlete_stats", filters, _load_athlete_stats)
 
-    training_avg = sum(training_scores) / len(training_scores) if training_scores else 0.0
-    competition_avg = sum(competition_scores) / len(competition_scores) if competition_scores else 0.0
-    standard_avg = sum(standard_scores) / len(standard_scores) if standard_scores else 0.0
 
-    training_delta = competition_avg - training_avg
+def _load_athlete_stats(filters: dict[str, Any]) -> dict[str, Any]:
+    """Per-athlete / per-mode aggregates from the athlete_day_stats rollup, plus overall totals."""
+    rollup_q = (
+        db.session.query(
+            AthleteDayStats.athlete_id.label("athlete_id"),
+            AthleteDayStats.mode.label("mode"),
+            Athlete.first_name.label("first_name"),
+            Athlete.last_name.label("last_name"),
+            Athlete.team.label("team"),
+            func.sum(AthleteDayStats.attempts).label("attempts"),
+            func.sum(AthleteDayStats.shots).label("shots"),
+            func.sum(AthleteDayStats.score_sum).label("score_sum"),
+            func.sum(AthleteDayStats.score_sq_sum).label("score_sq_sum"),
+            func.min(AthleteDayStats.score_min).label("score_min"),
+            func.max(AthleteDayStats.score_max).label("score_max"),
+        )
+        .outerjoin(Athlete, AthleteDayStats.athlete_id == Athlete.id)
+        .outerjoin(Rifle, Athlete.rifle_id == Rifle.id)
+        .group_by(AthleteDayStats.athlete_id, AthleteDayStats.mode)
+    )
+    rollup_q = _apply_filters(
+        rollup_q, filters, AthleteDayStats.day, AthleteDayStats.athlete_id, AthleteDayStats.mode
+    )
 
-    # Timeseries data by athlete
+    athletes: dict[str, dict[str, Any]] = {}
+    mode_totals: dict[str, list[int]] = {}
+    for row in rollup_q.all():
+        key = str(row.athlete_id) if row.athlete_id is not None else "unassigned"
+        name = f"{row.first_name} {row.last_name or ''}".strip() if row.first_name else None
+        stat = athletes.setdefault(
+            key,
+            {
+                "id": key,
+                "name": name or "Unassigned",
+                "team": row.team or "Unassigned",
+                "attempts": 0,
+                "shots": 0,
+                "sum": 0,
+                "sq_sum": 0,
+                "min": row.score_min,
+                "max": row.score_max,
+                "modes": {},
+            },
+        )
+        stat["attempts"] += row.attempts
+        stat["shots"] += row.shots
+        stat["sum"] += row.score_sum
+        stat["sq_sum"] += row.score_sq_sum
+        stat["min"] = min(stat["min"], row.score_min)
+        stat["max"] = max(stat["max"], row.score_max)
+        stat["modes"][row.mode] = (row.attempts, row.score_sum)
+
+        totals = mode_totals.setdefault(row.mode, [0, 0])
+        totals[0] += row.attempts
+        totals[1] += row.score_sum
+
+    stats = athletes.values()
+    attempts_count = sum(s["attempts"] for s in stats)
+    shots_total = sum(s["shots"] for s in stats)
+    score_total = sum(s["sum"] for s in stats)
+    return {
+        "athletes": athletes,
+        "modes": mode_totals,
+        "attempts": attempts_count,
+        "shots": shots_total,
+        "avg_score": score_total / attempts_count if attempts_count else 0.0,
+        "avg_shot_score": (score_total / shots_total) if shots_total else 0.0,
+        "min_score": float(min((s["min"] for s in stats), default=0)),
+        "max_score": float(max((s["max"] for s in stats), default=0)),
+        "stddev": _stddev_from_sums(attempts_count, score_total, sum(s["sq_sum"] for s in stats)),
+    }
+
+
+def _mode_avg(modes: dict, mode: str) -> float:
+    count, total = modes.get(mode, (0, 0))
+    return total / count if count else 0.0
+
+
+def _comparison_rows(filters: dict[str, Any]) -> list[dict[str, Any]]:
+    return _memo("comparison_rows", filters, _load_comparison_rows)
+
+
+def _load_comparison_rows(filters: dict[str, Any]) -> list[dict[str, Any]]:
+    comparison_rows = []
+    for stat in _athlete_stats(filters)["athletes"].values():
+        training_avg_a = _mode_avg(stat["modes"], "training")
+        competition_avg_a = _mode_avg(stat["modes"], "competition")
+        standard_avg_a = _mode_avg(stat["modes"], "standard")
+        overall_avg_a = stat["sum"] / stat["attempts"] if stat["attempts"] else 0.0
+        std_a = _stddev_from_sums(stat["attempts"], stat["sum"], stat["sq_sum"])
+        comparison_rows.append(
+            {
+                "id": stat["id"],
+                "name": stat["name"],
+                "team": stat["team"],
+                "training_avg": training_avg_a,
+                "competition_avg": competition_avg_a,
+                "standard_avg": standard_avg_a,
+                "overall_avg": overall_avg_a,
+                "delta": competition_avg_a - training_avg_a,
+                "min": float(stat["min"]),
+                "max": float(stat["max"]),
+                "stddev": std_a,
+                "attempts": stat["attempts"],
+            }
+        )
+
+    comparison_rows.sort(key=lambda r: r["overall_avg"], reverse=True)
+    return comparison_rows
+
+
+# ------------------------------------------------------------------
+# Sections
+# ------------------------------------------------------------------
+
+
+def _summary(filters: dict[str, Any]) -> dict[str, Any]:
+    stats = _athlete_stats(filters)
+    return {
+        "attempts": stats["attempts"],
+        "shots": stats["shots"],
+        "avg_score": round(stats["avg_score"], 2),
+        "avg_shot_score": round(stats["avg_shot_score"], 2),
+        "min_score": round(stats["min_score"], 2),
+        "max_score": round(stats["max_score"], 2),
+        "stddev": round(stats["stddev"], 2),
+    }
+
+
+def _training_vs_competition(filters: dict[str, Any]) -> dict[str, Any]:
+    modes = _athlete_stats(filters)["modes"]
+    training_avg = _mode_avg(modes, "training")
+    competition_avg = _mode_avg(modes, "competition")
+    return {
+        "training_avg": round(training_avg, 2),
+        "competition_avg": round(competition_avg, 2),
+        "standard_avg": round(_mode_avg(modes, "standard"), 2),
+        "delta": round(competition_avg - training_avg, 2),
+    }
+
+
+def _time_series(filters: dict[str, Any]) -> dict[str, Any] | bytes:
     series_by_athlete: dict[str, dict[str, Any]] = {}
     overall_series = []
     best_point = None
     worst_point = None
 
-    for attempt in attempts:
+    for attempt in _attempts(filters):
         created = attempt["created_at"]
         if not created:
             continue
@@ -308,78 +561,130 @@ def data():
         series["data"].sort(key=lambda p: p[0])
     overall_series.sort(key=lambda p: p[0])
 
-    # Athlete stats for comparison + consistency
-    athlete_stats: dict[str, dict[str, Any]] = {}
-    for attempt in attempts:
-        athlete_id = attempt["athlete_id"]
-        key = str(athlete_id) if athlete_id is not None else "unassigned"
-        stat = athlete_stats.setdefault(
-            key,
-            {
-                "id": key,
-                "name": attempt["athlete_name"] or "Unassigned",
-                "scores": [],
-                "training": [],
-                "competition": [],
-                "standard": [],
-                "team": attempt["team"] or "Unassigned",
-            },
-        )
-        stat["scores"].append(attempt["total_score"])
-        if attempt["mode"] == "training":
-            stat["training"].append(attempt["total_score"])
-        elif attempt["mode"] == "competition":
-            stat["competition"].append(attempt["total_score"])
-        elif attempt["mode"] == "standard":
-            stat["standard"].append(attempt["total_score"])
+    time_series = {
+        "series": list(series_by_athlete.values()),
+        "overall": overall_series,
+        "best_point": best_point,
+        "worst_point": worst_point,
+    }
+    if filters["format"] == "columnar":
+        return _columnar_time_series(time_series)
+    if filters["format"] == "binary":
+        return _binary_time_series(time_series)
+    return time_series
 
-    comparison_rows = []
-    for stat in athlete_stats.values():
-        training_avg_a = sum(stat["training"]) / len(stat["training"]) if stat["training"] else 0.0
-        competition_avg_a = (
-            sum(stat["competition"]) / len(stat["competition"]) if stat["competition"] else 0.0
-        )
-        standard_avg_a = sum(stat["standard"]) / len(stat["standard"]) if stat["standard"] else 0.0
-        scores_a = stat["scores"]
-        overall_avg_a = sum(scores_a) / len(scores_a) if scores_a else 0.0
-        std_a = _stddev(scores_a)
-        comparison_rows.append(
-            {
-                "id": stat["id"],
-                "name": stat["name"],
-                "team": stat["team"],
-                "training_avg": training_avg_a,
-                "competition_avg": competition_avg_a,
-                "standard_avg": standard_avg_a,
-                "overall_avg": overall_avg_a,
-                "delta": competition_avg_a - training_avg_a,
-                "min": min(scores_a) if scores_a else 0.0,
-                "max": max(scores_a) if scores_a else 0.0,
-                "stddev": std_a,
-                "attempts": len(scores_a),
-            }
-        )
 
-    comparison_rows.sort(key=lambda r: r["overall_avg"], reverse=True)
+def _delta_encode(values: list[int]) -> list[int]:
+    """First value followed by successive differences; small numbers keep sorted timestamps short in JSON."""
+    return [v - prev for prev, v in zip([0, *values], values)]
+
+
+def _columnar_time_series(time_series: dict[str, Any]) -> dict[str, Any]:
+    """
+    Time series as parallel arrays: `t` holds delta-encoded ms timestamps
+    (running sum restores them), `y` the scores.
+    """
+
+    def columns(points):
+        return {"t": _delta_encode([p[0] for p in points]), "y": [p[1] for p in points]}
+
+    return {
+        "format": "columnar",
+        "series": [{"id": s["id"], "name": s["name"], **columns(s["data"])} for s in time_series["series"]],
+        "overall": columns(time_series["overall"]),
+        "best_point": time_series["best_point"],
+        "worst_point": time_series["worst_point"],
+    }
+
+
+def _binary_time_series(time_series: dict[str, Any]) -> bytes:
+    """
+    Time series packed for typed arrays, little-endian:
+
+        uint32      header length in bytes
+        header      UTF-8 JSON: best_point, worst_point, overall (point count),
+                    series [{id, name, n}]
+        padding     zero bytes up to an 8-byte boundary
+        float64[]   ms timestamps, overall first, then each series in header order
+        float32[]   scores, same order
+    """
+    runs = [time_series["overall"]] + [s["data"] for s in time_series["series"]]
+    header = json.dumps(
+        {
+            "best_point": time_series["best_point"],
+            "worst_point": time_series["worst_point"],
+            "overall": len(time_series["overall"]),
+            "series": [{"id": s["id"], "name": s["name"], "n": len(s["data"])} for s in time_series["series"]],
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    timestamps = array("d", (p[0] for run in runs for p in run))
+    scores = array("f", (p[1] for run in runs for p in run))
+    if sys.byteorder == "big":
+        timestamps.byteswap()
+        scores.byteswap()
+
+    prefix = struct.pack("<I", len(header)) + header
+    padding = b"\0" * (-len(prefix) % 8)
+    return prefix + padding + timestamps.tobytes() + scores.tobytes()
+
+
+def _comparison(filters: dict[str, Any]) -> dict[str, Any]:
+    comparison_rows = _comparison_rows(filters)
+
+    # Score trend per athlete in points per day, fitted in SQL (regr_slope is registered in models.py)
+    days = func.julianday(Image.created_at) - UNIX_EPOCH_JULIAN_DAY
+    trends_q = (
+        db.session.query(
+            Image.athlete_id.label("athlete_id"),
+            Athlete.first_name.label("first_name"),
+            Athlete.last_name.label("last_name"),
+            func.regr_slope(Image.cached_total_score, days).label("slope"),
+        )
+        .join(Session, Image.session_id == Session.id)
+        .outerjoin(Athlete, Image.athlete_id == Athlete.id)
+        .outerjoin(Rifle, Athlete.rifle_id == Rifle.id)
+        .group_by(Image.athlete_id)
+        .order_by(func.min(Image.id))
+    )
+    trends_q = _apply_filters(trends_q, filters)
 
-    # Trend calculation
     trends = []
-    for key, series in series_by_athlete.items():
-        points = [(p[0] / 86400000.0, p[1]) for p in series["data"]]
-        slope = _slope(points)
+    for row in trends_q.all():
+        slope = row.slope or 0.0
         direction = "up" if slope > 0 else "down" if slope < 0 else "flat"
+        name = f"{row.first_name} {row.last_name or ''}".strip() if row.first_name else None
         trends.append(
             {
-                "id": key,
-                "name": series["name"],
+                "id": str(row.athlete_id) if row.athlete_id is not None else "unassigned",
+                "name": name or "Unassigned",
                 "slope": slope,
                 "direction": direction,
             }
         )
 
-    # Team aggregations + drilldown
+    return {
+        "categories": [r["name"] for r in comparison_rows],
+        "series": [
+            {"name": "Training Avg", "data": [round(r["training_avg"], 2) for r in comparison_rows]},
+            {"name": "Competition Avg", "data": [round(r["competition_avg"], 2) for r in comparison_rows]},
+            {"name": "Standard Avg", "data": [round(r["standard_avg"], 2) for r in comparison_rows]},
+            {
+                "name": "Delta (Comp - Train)",
+                "type": "spline",
+                "yAxis": 1,
+                "data": [round(r["delta"], 2) for r in comparison_rows],
+            },
+        ],
+        "table": comparison_rows,
+        "trends": trends,
+    }
+
+
+def _team(filters: dict[str, Any]) -> dict[str, Any]:
     team_stats: dict[str, dict[str, Any]] = {}
-    for row in comparison_rows:
+    for row in _comparison_rows(filters):
         team = row["team"] or "Unassigned"
         team_stat = team_stats.setdefault(team, {"scores": [], "athletes": []})
         team_stat["scores"].append(row["overall_avg"] or 0.0)
@@ -394,52 +699,160 @@ def data():
         team_series_data.append(round(avg, 2))
         drilldown.append({"id": team, "name": f"{team} athletes", "data": stat["athletes"]})
 
-    # Shot distribution (scatter + heatmap)
-    shots_q = (
-        db.session.query(
-            Shot.dist_mm.label("dist_mm"),
-            Shot.shot_index.label("shot_index"),
-            score_expr.label("score"),
-            Image.created_at.label("created_at"),
-            Session.mode.label("mode"),
-            Athlete.first_name.label("first_name"),
-            Athlete.last_name.label("last_name"),
-        )
+    return {
+        "categories": team_categories,
+        "series": [{"name": "Avg Score", "data": team_series_data}],
+        "drilldown": drilldown,
+    }
+
+
+def _shots_query(filters: dict[str, Any], *columns):
+    query = (
+        db.session.query(*columns)
         .join(Image, Shot.image_id == Image.id)
         .join(Session, Image.session_id == Session.id)
         .outerjoin(Athlete, Image.athlete_id == Athlete.id)
         .outerjoin(Rifle, Athlete.rifle_id == Rifle.id)
     )
-    shots_q = _apply_filters(shots_q, filters)
-    shot_rows = shots_q.all()
-
-    scatter_points = []
-    max_index = 0
-    score_set = set()
-    heat_counts: dict[tuple[int, int], int] = {}
-
-    for row in shot_rows:
-        score = int(row.score or 0)
-        dist = float(row.dist_mm or 0)
-        idx = int(row.shot_index or 0)
-        if idx > max_index:
-            max_index = idx
-        score_set.add(score)
-        heat_counts[(idx, score)] = heat_counts.get((idx, score), 0) + 1
-
+    return _apply_filters(query, filters)
+
+
+def _scatter(filters: dict[str, Any]):
+    """
+    Shot score vs distance from center, reduced to at most `max_points` points.
+
+    sample=reservoir (default) keeps a uniform random subset of the shots;
+    sample=grid bins shots by score and distance and returns one point per
+    non-empty cell with its mean distance and shot count. format=columnar
+    returns parallel arrays instead of one dict per point.
+    """
+    options = filters["scatter"]
+    if options["sample"] == "grid":
+        return _scatter_grid(filters, options)
+    return _scatter_reservoir(filters, options)
+
+
+def _scatter_reservoir(filters: dict[str, Any], options: dict[str, Any]):
+    max_points = options["max_points"]
+    detail_q = _shots_query(
+        filters,
+        Shot.dist_mm.label("dist_mm"),
+        _score_expr().label("score"),
+        Image.created_at.label("created_at"),
+        Session.mode.label("mode"),
+        Athlete.first_name.label("first_name"),
+        Athlete.last_name.label("last_name"),
+    ).order_by(Shot.id)
+
+    if not max_points:
+        rows = detail_q.all()
+        total = len(rows)
+    else:
+        # Sample over a stream of bare shot ids so memory stays at max_points and no row objects are
+        # built per shot, then load only the chosen rows. The fixed seed keeps samples (and ETags) stable.
+        ids_q = _shots_query(filters, Shot.id).order_by(Shot.id)
+        rng = random.Random(0)
+        sample = []
+        total = 0
+        for shot_id in db.session.scalars(ids_q.statement.execution_options(yield_per=5000)):
+            total += 1
+            if len(sample) < max_points:
+                sample.append(shot_id)
+                continue
+            slot = rng.randrange(total)
+            if slot < max_points:
+                sample[slot] = shot_id
+        sample.sort()
+
+        rows = []
+        for chunk in range(0, len(sample), 500):
+            rows.extend(detail_q.filter(Shot.id.in_(sample[chunk:chunk + 500])).all())
+
+    points = []
+    for row in rows:
         athlete_name = (
             f"{row.first_name} {row.last_name or ''}".strip() if row.first_name else "Unassigned"
         )
-        scatter_points.append(
+        points.append(
             {
-                "x": score,
-                "y": dist,
+                "x": int(row.score or 0),
+                "y": float(row.dist_mm or 0),
                 "athlete": athlete_name,
                 "mode": row.mode,
                 "created_at": row.created_at.isoformat() if row.created_at else None,
             }
         )
 
+    if filters["format"] != "columnar":
+        return points
+
+    athletes = sorted({p["athlete"] for p in points})
+    modes = sorted({p["mode"] for p in points if p["mode"]})
+    athlete_codes = {name: i for i, name in enumerate(athletes)}
+    mode_codes = {mode: i for i, mode in enumerate(modes)}
+    return {
+        "sample": "reservoir",
+        "total": total,
+        "x": [p["x"] for p in points],
+        "y": [round(p["y"], 2) for p in points],
+        "athlete": [athlete_codes[p["athlete"]] for p in points],
+        "mode": [mode_codes.get(p["mode"], -1) for p in points],
+        "created_at": [p["created_at"] for p in points],
+        "athletes": athletes,
+        "modes": modes,
+    }
+
+
+def _scatter_grid(filters: dict[str, Any], options: dict[str, Any]):
+    score = _score_expr()
+    max_dist = _shots_query(filters, func.max(Shot.dist_mm)).scalar()
+
+    cells = []
+    if max_dist is not None:
+        # 11 score columns (0..10); the point budget decides how finely distance is split
+        rows = max((options["max_points"] or 1100) // 11, 1)
+        bin_width = (max_dist / rows) or 1.0
+        dist_bin = func.min(cast(func.coalesce(Shot.dist_mm, 0) / bin_width, Integer), rows - 1)
+        cells_q = _shots_query(
+            filters,
+            score.label("score"),
+            dist_bin.label("bin"),
+            func.avg(Shot.dist_mm).label("dist_mm"),
+            func.count(Shot.id).label("shots"),
+        ).group_by(score, dist_bin).order_by(score, dist_bin)
+        cells = cells_q.all()
+
+    points = [
+        {"x": int(cell.score or 0), "y": round(float(cell.dist_mm or 0), 2), "count": int(cell.shots)}
+        for cell in cells
+    ]
+
+    if filters["format"] != "columnar":
+        return points
+    return {
+        "sample": "grid",
+        "total": sum(p["count"] for p in points),
+        "x": [p["x"] for p in points],
+        "y": [p["y"] for p in points],
+        "count": [p["count"] for p in points],
+    }
+
+
+def _heatmap(filters: dict[str, Any]) -> dict[str, Any]:
+    heat_q = (
+        db.session.query(
+            ShotHeatStats.shot_index,
+            ShotHeatStats.score,
+            func.sum(ShotHeatStats.shots),
+        )
+        .outerjoin(Athlete, ShotHeatStats.athlete_id == Athlete.id)
+        .outerjoin(Rifle, Athlete.rifle_id == Rifle.id)
+        .group_by(ShotHeatStats.shot_index, ShotHeatStats.score)
+    )
+    heat_q = _apply_filters(heat_q, filters, ShotHeatStats.day, ShotHeatStats.athlete_id, ShotHeatStats.mode)
+    heat_counts = {(idx, score): int(count) for idx, score, count in heat_q.all()}
+    max_index = max((idx for idx, _ in heat_counts), default=0)
+
     score_categories = list(range(10, -1, -1))
     index_categories = list(range(1, max_index + 1)) if max_index else [1]
 
@@ -449,7 +862,15 @@ def data():
             count = heat_counts.get((shot_idx, score), 0)
             heatmap_data.append([x_idx, y_idx, count])
 
-    # Series analysis (competition series)
+    return {
+        "xCategories": [str(x) for x in index_categories],
+        "yCategories": [str(y) for y in score_categories],
+        "data": heatmap_data,
+    }
+
+
+def _series_analysis(filters: dict[str, Any]) -> dict[str, Any]:
+    """Competition series totals per series number, from the cached image totals."""
     series_q = (
         db.session.query(
             Series.id.label("series_id"),
@@ -457,22 +878,21 @@ def data():
             Series.created_at.label("created_at"),
             CompetitionAthlete.athlete_id.label("athlete_id"),
             Athlete.team.label("team"),
-            func.sum(score_expr).label("total_score"),
-            func.count(Shot.id).label("shots_count"),
+            func.sum(Image.cached_total_score).label("total_score"),
+            func.sum(Image.cached_shots_count).label("shots_count"),
         )
         .join(Image, Image.series_id == Series.id)
-        .join(Shot, Shot.image_id == Image.id)
+        .join(Session, Image.session_id == Session.id)
         .join(CompetitionAthlete, Series.competition_athlete_id == CompetitionAthlete.id)
         .join(Athlete, CompetitionAthlete.athlete_id == Athlete.id)
         .outerjoin(Rifle, Athlete.rifle_id == Rifle.id)
+        .filter(Image.cached_shots_count > 0)
         .group_by(Series.id)
     )
-
     series_q = _apply_filters(series_q, filters)
-    series_rows = series_q.all()
 
     series_bucket: dict[int, list[float]] = {}
-    for row in series_rows:
+    for row in series_q.all():
         series_bucket.setdefault(row.series_number, []).append(float(row.total_score or 0))
 
     series_categories = []
@@ -486,9 +906,18 @@ def data():
         series_min.append(min(vals))
         series_max.append(max(vals))
 
-    # Consistency (standard deviation normalized)
+    return {
+        "categories": series_categories,
+        "avg": [round(v, 2) for v in series_avg],
+        "min": [round(v, 2) for v in series_min],
+        "max": [round(v, 2) for v in series_max],
+    }
+
+
+def _consistency(filters: dict[str, Any]) -> dict[str, Any]:
+    """Standard deviation normalized by score range, overall and for the top athletes."""
     consistency_items = []
-    for row in comparison_rows[:6]:
+    for row in _comparison_rows(filters)[:6]:
         stddev = row["stddev"]
         score_range = max(row["max"] - row["min"], 1.0)
         consistency_index = max(0.0, 100.0 - (stddev / score_range) * 100.0)
@@ -502,12 +931,24 @@ def data():
             }
         )
 
-    overall_range = max(max_score - min_score, 1.0)
-    overall_index = max(0.0, 100.0 - (std_score / overall_range) * 100.0)
+    stats = _athlete_stats(filters)
+    overall_range = max(stats["max_score"] - stats["min_score"], 1.0)
+    overall_index = max(0.0, 100.0 - (stats["stddev"] / overall_range) * 100.0)
+
+    return {
+        "overall": {
+            "index": round(overall_index, 1),
+            "stddev": round(stats["stddev"], 2),
+            "avg": round(stats["avg_score"], 2),
+        },
+        "items": consistency_items,
+    }
+
 
-    # Sparklines from attempts grouped by session
+def _sparklines(filters: dict[str, Any]) -> list[dict[str, Any]] | dict[str, Any]:
+    """Attempt totals of the 12 most recently active sessions."""
     session_map: dict[int, dict[str, Any]] = {}
-    for attempt in attempts:
+    for attempt in _attempts(filters):
         sid = attempt["session_id"]
         if not sid:
             continue
@@ -547,83 +988,25 @@ def data():
     sparklines.sort(key=lambda s: s["updated_at"] or "", reverse=True)
     sparklines = sparklines[:12]
 
-    response = {
-        "filters": {
-            "start": request.args.get("start"),
-            "end": request.args.get("end"),
-            "athlete_ids": filters["athlete_ids"],
-            "teams": filters["teams"],
-            "rifle_ids": filters["rifle_ids"],
-            "jacket_ids": filters["jacket_ids"],
-            "scope_ids": filters["scope_ids"],
-            "modes": filters["modes"],
-            "include_unassigned": filters["include_unassigned"],
-        },
-        "summary": {
-            "attempts": len(attempts),
-            "shots": shots_total,
-            "avg_score": round(avg_score, 2),
-            "avg_shot_score": round(avg_shot_score, 2),
-            "min_score": round(min_score, 2),
-            "max_score": round(max_score, 2),
-            "stddev": round(std_score, 2),
-        },
-        "training_vs_competition": {
-            "training_avg": round(training_avg, 2),
-            "competition_avg": round(competition_avg, 2),
-            "standard_avg": round(standard_avg, 2),
-            "delta": round(training_delta, 2),
-        },
-        "time_series": {
-            "series": list(series_by_athlete.values()),
-            "overall": overall_series,
-            "best_point": best_point,
-            "worst_point": worst_point,
-        },
-        "comparison": {
-            "categories": [r["name"] for r in comparison_rows],
-            "series": [
-                {"name": "Training Avg", "data": [round(r["training_avg"], 2) for r in comparison_rows]},
-                {"name": "Competition Avg", "data": [round(r["competition_avg"], 2) for r in comparison_rows]},
-                {"name": "Standard Avg", "data": [round(r["standard_avg"], 2) for r in comparison_rows]},
-                {
-                    "name": "Delta (Comp - Train)",
-                    "type": "spline",
-                    "yAxis": 1,
-                    "data": [round(r["delta"], 2) for r in comparison_rows],
-                },
-            ],
-            "table": comparison_rows,
-            "trends": trends,
-        },
-        "team": {
-            "categories": team_categories,
-            "series": [{"name": "Avg Score", "data": team_series_data}],
-            "drilldown": drilldown,
-        },
-        "distribution": {
-            "scatter": scatter_points,
-            "heatmap": {
-                "xCategories": [str(x) for x in index_categories],
-                "yCategories": [str(y) for y in score_categories],
-                "data": heatmap_data,
-            },
-        },
-        "series_analysis": {
-            "categories": series_categories,
-            "avg": [round(v, 2) for v in series_avg],
-            "min": [round(v, 2) for v in series_min],
-            "max": [round(v, 2) for v in series_max],
-        },
-        "consistency": {
-            "overall": {
-                "index": round(overall_index, 1),
-                "stddev": round(std_score, 2),
-                "avg": round(avg_score, 2),
-            },
-            "items": consistency_items,
-        },
-        "sparklines": sparklines,
-    }
-
-    return jsonify(response)
+    if filters["format"] == "columnar":
+        columns = ("session_id", "name", "mode", "updated_at", "data")
+        return {"format": "columnar", **{field: [s[field] for s in sparklines] for field in columns}}
+    return sparklines
+
+
+# Independently fetchable parts of /data, served at /data/<name>
+SECTIONS = {
+    "summary": _summary,
+    "training_vs_competition": _training_vs_competition,
+    "time_series": _time_series,
+    "comparison": _comparison,
+    "team": _team,
+    "scatter": _scatter,
+    "heatmap": _heatmap,
+    "series_analysis": _series_analysis,
+    "consistency": _consistency,
+    "sparklines": _sparklines,
+}
+
+# Sections that can answer format=binary
+BINARY_SECTIONS = {"time_series"}
@@ -0,0 +1,114 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+from models import (
+    Athlete,
+    CompetitionAthlete,
+    Image,
+    Rifle,
+    Series,
+    Session,
+    Shot,
+    analytics_generation,
+    bump_analytics_generation,
+    db,
+)
+
+# ============================================================
+# WRITE GENERATION
+# ============================================================
+
+# Models whose rows show up in analytics responses or are joined by their filters
+TRACKED_MODELS = (Shot, Image, Series, Session, Athlete, CompetitionAthlete, Rifle)
+
+
+def current_generation() -> int:
+    """Shared by all processes (see models.analytics_generation); raw-SQL writers bump it themselves."""
+    return analytics_generation(db.session.connection())
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _note_tracked_writes(session, flush_context):
+    # Bumped in the writing transaction: the new generation becomes visible together with the new rows
+    if session.info.get("analytics_bumped"):
+        return
+    if any(isinstance(obj, TRACKED_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        bump_analytics_generation(session.connection())
+        session.info["analytics_bumped"] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+@event.listens_for(OrmSession, "after_rollback")
+def _end_transaction(session):
+    session.info.pop("analytics_bumped", None)
+
+
+# ============================================================
+# RESPONSE CACHE
+# ============================================================
+
+
+class CachedResponse:
+    __slots__ = ("body", "mimetype", "etag", "generation", "expires_at")
+
+    def __init__(self, body: bytes, mimetype: str, generation: int, expires_at: float):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.generation = generation
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    In-memory LRU of serialized responses keyed by a canonical filter string.
+
+    An entry is served only while it is younger than `ttl` seconds and was
+    built at the current write generation; at most `max_entries` are kept.
+    """
+
+    def __init__(self, max_entries=64, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key, generation):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != generation or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, generation, body: bytes, mimetype="application/json") -> CachedResponse:
+        entry = CachedResponse(body, mimetype, generation, time.time() + self.ttl)
+        if not self.enabled:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
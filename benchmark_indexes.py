@@ -0,0 +1,249 @@
+"""Measure the model indexes on a synthetic database.
+
+Usage:
+    python benchmark_indexes.py [--shots N] [--db PATH] [--repeat N]
+
+Builds a throwaway SQLite database with N shots (default 1,000,000; ten per
+image, twenty images per session) and runs the queries behind the analytics
+filters, the session/series image joins and the training session list.
+Each query runs first without the indexes managed by ensure_indexes(), then
+with them. The script prints the query plan and the median time per query
+for both runs.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from models import db, ensure_indexes
+
+SHOTS_PER_IMAGE = 10
+IMAGES_PER_SESSION = 20
+ATHLETES = 40
+START = datetime(2024, 1, 1)
+DAYS = 730
+
+# (name, SQL, params) mirroring the statements the app issues on these paths
+QUERIES = [
+    (
+        "analytics attempts, one month",
+        """
+        SELECT i.id, i.created_at, se.mode, a.first_name, i.total_score
+        FROM images i JOIN sessions se ON i.session_id = se.id
+        LEFT JOIN athletes a ON i.athlete_id = a.id
+        WHERE i.created_at >= :start AND i.created_at < :end
+        ORDER BY i.id
+        """,
+        {"start": "2025-06-01", "end": "2025-07-01"},
+    ),
+    (
+        "analytics attempts, two athletes",
+        """
+        SELECT i.id, i.created_at, se.mode, i.total_score
+        FROM images i JOIN sessions se ON i.session_id = se.id
+        WHERE i.athlete_id IN (:a1, :a2) AND i.created_at >= :start AND i.created_at < :end
+        ORDER BY i.id
+        """,
+        {"a1": 3, "a2": 17, "start": "2025-01-01", "end": "2025-04-01"},
+    ),
+    (
+        "analytics shots, athlete + mode + month",
+        """
+        SELECT s.dist_mm, COALESCE(s.final_score, s.auto_score, 0)
+        FROM shots s JOIN images i ON s.image_id = i.id
+        JOIN sessions se ON i.session_id = se.id
+        WHERE i.athlete_id = :athlete AND se.mode = 'training'
+          AND i.created_at >= :start AND i.created_at < :end
+        """,
+        {"athlete": 5, "start": "2025-06-01", "end": "2025-07-01"},
+    ),
+    (
+        "session images",
+        "SELECT id, total_score, shots_count FROM images WHERE session_id = :sid",
+        {"sid": 1234},
+    ),
+    (
+        "session shots",
+        """
+        SELECT s.id, s.idx, s.auto_score
+        FROM shots s JOIN images i ON s.image_id = i.id
+        WHERE i.session_id = :sid
+        ORDER BY s.image_id, s.idx
+        """,
+        {"sid": 1234},
+    ),
+    (
+        "series images",
+        "SELECT id, total_score FROM images WHERE series_id = :series",
+        {"series": 321},
+    ),
+    (
+        "session list, all",
+        """
+        SELECT id, name, started_at FROM sessions
+        WHERE mode = 'training'
+        ORDER BY started_at DESC LIMIT 20
+        """,
+        {},
+    ),
+    (
+        "session list, active page",
+        """
+        SELECT id, name, started_at FROM sessions
+        WHERE mode = 'training' AND finished_at IS NULL
+        ORDER BY started_at DESC LIMIT 20
+        """,
+        {},
+    ),
+    (
+        "session list, finished page",
+        """
+        SELECT id, name, started_at FROM sessions
+        WHERE mode = 'training' AND finished_at IS NOT NULL
+        ORDER BY started_at DESC LIMIT 20 OFFSET 100
+        """,
+        {},
+    ),
+    (
+        "session list, count",
+        "SELECT COUNT(*) FROM sessions WHERE mode = 'training' AND finished_at IS NOT NULL",
+        {},
+    ),
+]
+
+
+def build_database(engine, shots):
+    """Fill the schema with `shots` synthetic shots; returns the row counts."""
+    rng = random.Random(0)
+    images = max(1, shots // SHOTS_PER_IMAGE)
+    sessions = max(1, images // IMAGES_PER_SESSION)
+
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO athletes (id, first_name, gender, rifle_id, jacket_id, team) VALUES (?, ?, 'other', 1, 1, ?)",
+            [(a, f"Athlete {a}", f"T{a % 4}") for a in range(1, ATHLETES + 1)],
+        )
+
+        session_rows = []
+        for sid in range(1, sessions + 1):
+            started = START + timedelta(days=DAYS * sid / sessions)
+            mode = "competition" if sid % 5 == 0 else "training"
+            finished = None if sid > sessions - 50 else started + timedelta(hours=2)
+            session_rows.append((sid, f"Session {sid}", mode, started.isoformat(" "), finished and finished.isoformat(" ")))
+        conn.exec_driver_sql(
+            "INSERT INTO sessions (id, name, mode, started_at, finished_at) VALUES (?, ?, ?, ?, ?)", session_rows
+        )
+
+        image_rows = []
+        for iid in range(1, images + 1):
+            sid = (iid - 1) // IMAGES_PER_SESSION + 1
+            created = START + timedelta(days=DAYS * sid / sessions, minutes=iid % IMAGES_PER_SESSION * 3)
+            athlete = None if iid % 50 == 0 else rng.randint(1, ATHLETES)
+            series = sid if sid % 5 == 0 else None
+            image_rows.append(
+                (iid, f"{iid}.jpg", f"static/uploads/{iid}.jpg", created.isoformat(" "), sid, athlete, series, 0, 0)
+            )
+        conn.exec_driver_sql(
+            "INSERT INTO images (id, filename, original_path, created_at, session_id, athlete_id, series_id, "
+            "total_score, shots_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            image_rows,
+        )
+
+        batch = []
+        for n in range(images * SHOTS_PER_IMAGE):
+            dx, dy = rng.gauss(0, 8), rng.gauss(0, 8)
+            dist = (dx * dx + dy * dy) ** 0.5
+            batch.append((n // SHOTS_PER_IMAGE + 1, n % SHOTS_PER_IMAGE + 1, dx, dy, dist, max(0, 10 - int(dist / 2.5))))
+            if len(batch) == 50000:
+                _insert_shots(conn, batch)
+                batch = []
+        if batch:
+            _insert_shots(conn, batch)
+
+        conn.exec_driver_sql(
+            "UPDATE images SET total_score = (SELECT SUM(auto_score) FROM shots WHERE image_id = images.id), "
+            f"shots_count = {SHOTS_PER_IMAGE}"
+        )
+    return {"sessions": sessions, "images": images, "shots": images * SHOTS_PER_IMAGE}
+
+
+def _insert_shots(conn, batch):
+    conn.exec_driver_sql(
+        "INSERT INTO shots (image_id, idx, center_px, dx_mm, dy_mm, dist_mm, bullet_radius_px, auto_score, created_at) "
+        "VALUES (?, ?, '[0, 0]', ?, ?, ?, 4.5, ?, CURRENT_TIMESTAMP)",
+        batch,
+    )
+
+
+def managed_indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def run_queries(engine, repeat):
+    """Return {query name: (plan lines, median ms)}."""
+    results = {}
+    with engine.connect() as conn:
+        for name, sql, params in QUERIES:
+            plan = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.exec_driver_sql(sql, params).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the model indexes on a synthetic database.")
+    parser.add_argument("--shots", type=int, default=1_000_000)
+    parser.add_argument("--db", help="database file to create (default: a temporary file, removed afterwards)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+    args = parser.parse_args(argv)
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+
+    started = time.perf_counter()
+    counts = build_database(engine, args.shots)
+    print(f"built {json.dumps(counts)} in {time.perf_counter() - started:.1f}s at {path}")
+
+    with engine.begin() as conn:
+        for index in managed_indexes():
+            index.drop(conn, checkfirst=True)
+    before = run_queries(engine, args.repeat)
+
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        ensure_indexes(conn)
+        created = time.perf_counter() - started
+        started = time.perf_counter()
+        ensure_indexes(conn)
+        rerun = time.perf_counter() - started
+    print(f"ensure_indexes: {created:.2f}s to create, {rerun * 1000:.1f}ms when already present")
+    after = run_queries(engine, args.repeat)
+
+    for name, _, _ in QUERIES:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        print(f"\n{name}: {ms_before:.2f}ms -> {ms_after:.2f}ms ({ms_before / max(ms_after, 1e-6):.1f}x)")
+        print("  without: " + "; ".join(plan_before))
+        print("  with:    " + "; ".join(plan_after))
+
+    engine.dispose()
+    if not args.db:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
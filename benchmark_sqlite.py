@@ -0,0 +1,232 @@
+"""Measure concurrent read/write throughput with and without the SQLite tuning.
+
+Usage:
+    python benchmark_sqlite.py [--writers N] [--readers N] [--seconds S]
+
+Runs the same workload twice, each time in a fresh subprocess on a fresh
+database: once with SQLITE_TUNING=0 (SQLite defaults, default pool) and
+once with the SQLITE_PRAGMAS and pool size from config.py. Writer threads
+save images the way /training/save does: an ORM flush, bulk_insert_shots()
+and a commit. Reader threads run the analytics attempts query, a
+per-session shot aggregate and a dashboard-wide shot scan. The script
+prints operations per second, latency percentiles and "database is locked"
+errors for both runs.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SEED_IMAGES = 4000
+SHOTS_PER_IMAGE = 40
+ATHLETES = 40
+SESSIONS = 200
+
+READ_QUERIES = [
+    """
+    SELECT i.id, i.created_at, se.mode, i.athlete_id, i.total_score, i.shots_count
+    FROM images i JOIN sessions se ON i.session_id = se.id
+    WHERE i.athlete_id = :athlete
+    ORDER BY i.id
+    """,
+    """
+    SELECT COALESCE(sh.final_score, sh.auto_score, 0) AS score, COUNT(*)
+    FROM shots sh JOIN images i ON i.id = sh.image_id
+    WHERE i.session_id = :session
+    GROUP BY score
+    """,
+    # Dashboard-wide scan like the scatter/consistency sections; holds the read lock longest
+    """
+    SELECT i.athlete_id, COUNT(*), AVG(sh.dist_mm)
+    FROM shots sh JOIN images i ON i.id = sh.image_id
+    WHERE i.created_at >= datetime('now', :since)
+    GROUP BY i.athlete_id
+    """,
+]
+
+
+def make_shots(rng, count):
+    shots = []
+    for n in range(count):
+        dx, dy = rng.gauss(0, 8), rng.gauss(0, 8)
+        dist = (dx * dx + dy * dy) ** 0.5
+        shots.append(
+            {
+                "id": n + 1,
+                "center_px": [rng.randint(0, 999), rng.randint(0, 999)],
+                "dx_mm": dx,
+                "dy_mm": dy,
+                "dist_mm": dist,
+                "bullet_radius_px": 4.5,
+                "score": max(0, 10 - int(dist / 2.5)),
+            }
+        )
+    return shots
+
+
+def seed(engine):
+    from models import db, rebuild_rollups, refresh_score_totals
+
+    rng = random.Random(0)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO athletes (id, first_name, gender, rifle_id, jacket_id) VALUES (?, ?, 'other', 1, 1)",
+            [(a, f"Athlete {a}") for a in range(1, ATHLETES + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO sessions (id, name, mode, started_at) VALUES (?, ?, 'training', CURRENT_TIMESTAMP)",
+            [(s, f"Session {s}") for s in range(1, SESSIONS + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO images (id, filename, original_path, created_at, session_id, athlete_id) "
+            "VALUES (?, 'seed.jpg', 'seed.jpg', datetime('now', ?), ?, ?)",
+            [(i, f"-{i % 60} days", i % SESSIONS + 1, i % ATHLETES + 1) for i in range(1, SEED_IMAGES + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO shots (image_id, idx, center_px, dx_mm, dy_mm, dist_mm, bullet_radius_px, auto_score, "
+            "final_score, created_at) VALUES (?, ?, '[0, 0]', ?, ?, ?, 4.5, ?, ?, CURRENT_TIMESTAMP)",
+            [
+                (i, s["id"], s["dx_mm"], s["dy_mm"], s["dist_mm"], s["score"], s["score"])
+                for i in range(1, SEED_IMAGES + 1)
+                for s in make_shots(rng, SHOTS_PER_IMAGE)
+            ],
+        )
+        refresh_score_totals(conn)
+        rebuild_rollups(conn)
+
+
+def run_workload(writers, readers, seconds):
+    """Runs in the subprocess; SQLITE_TUNING is already set in its environment."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session as OrmSession
+
+    from config import DB_MAX_OVERFLOW, DB_POOL_SIZE, DB_POOL_TIMEOUT, SQLITE_TUNING
+    from models import Image, bulk_insert_shots
+
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    options = {}
+    if SQLITE_TUNING:
+        options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    engine = create_engine(f"sqlite:///{path}", **options)
+    seed(engine)
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"writes": 0, "reads": 0, "write_errors": 0, "read_errors": 0, "read_ms": [], "write_ms": []}
+    errors = set()
+
+    def record(kind, started, error=None):
+        with lock:
+            if error is None:
+                stats[kind + "s"] += 1
+                stats[kind + "_ms"].append((time.perf_counter() - started) * 1000)
+            else:
+                stats[kind + "_errors"] += 1
+                errors.add(str(getattr(error, "orig", error)))
+
+    def writer(n):
+        rng = random.Random(100 + n)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with OrmSession(engine) as session:
+                    image = Image(
+                        filename="bench.jpg",
+                        original_path="bench.jpg",
+                        session_id=rng.randint(1, SESSIONS),
+                        athlete_id=rng.randint(1, ATHLETES),
+                    )
+                    session.add(image)
+                    session.flush()
+                    bulk_insert_shots(session, image, make_shots(rng, SHOTS_PER_IMAGE))
+                    session.commit()
+                record("write", started)
+            except Exception as e:
+                record("write", started, e)
+
+    def reader(n):
+        rng = random.Random(200 + n)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text(READ_QUERIES[0]), {"athlete": rng.randint(1, ATHLETES)}).fetchall()
+                    conn.execute(text(READ_QUERIES[1]), {"session": rng.randint(1, SESSIONS)}).fetchall()
+                    conn.execute(text(READ_QUERIES[2]), {"since": f"-{rng.randint(7, 60)} days"}).fetchall()
+                record("read", started)
+            except Exception as e:
+                record("read", started, e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    def percentile(values, q):
+        return round(statistics.quantiles(values, n=100)[q - 1], 2) if len(values) > 1 else None
+
+    return {
+        "journal_mode": journal_mode,
+        "writes_per_s": round(stats["writes"] / seconds, 1),
+        "reads_per_s": round(stats["reads"] / seconds, 1),
+        "write_p50_ms": percentile(stats["write_ms"], 50),
+        "write_p95_ms": percentile(stats["write_ms"], 95),
+        "read_p50_ms": percentile(stats["read_ms"], 50),
+        "read_p95_ms": percentile(stats["read_ms"], 95),
+        "write_errors": stats["write_errors"],
+        "read_errors": stats["read_errors"],
+        "errors": sorted(errors),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent SQLite access with and without tuning.")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_workload(args.writers, args.readers, args.seconds)))
+        return
+
+    results = {}
+    for label, tuning in (("default", "0"), ("tuned", "1")):
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", "--writers", str(args.writers),
+             "--readers", str(args.readers), "--seconds", str(args.seconds)],
+            env={**os.environ, "SQLITE_TUNING": tuning},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[label] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g}s each")
+    print(f"{'':16}{'default':>12}{'tuned':>12}")
+    for key in results["default"]:
+        if key != "errors":
+            print(f"{key:16}{str(results['default'][key]):>12}{str(results['tuned'][key]):>12}")
+    for label, result in results.items():
+        for error in result["errors"]:
+            print(f"{label} error: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Measure cold-start import cost of each entry point with `python -X importtime`.
+
+Usage:
+    python benchmark_startup.py [--repeat N] [--without-key] [--json]
+
+Every entry point is imported in a fresh interpreter, `--repeat` times
+(default 3; the fastest run is reported). For each one the script prints
+the wall time of the interpreter, the cumulative import time of its own
+modules as reported by -X importtime, whether the vision stack (cv2, numpy,
+inference) got imported, and the heaviest top-level imports.
+--without-key unsets ROBOFLOW_API_KEY to check that the entry point still
+starts without it. --json prints the raw numbers for tracking over time.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# name -> statement run in the fresh interpreter
+ENTRY_POINTS = {
+    "app": "import app",
+    "app.create_app()": "import app; app.create_app()",
+    "management": "import management",
+    "analytics": "import analytics",
+    "training": "import training",
+    "competition": "import competition",
+    "migrations": "import migrations",
+    "scorer": "import scorer",
+    "rescore": "import rescore",
+}
+
+VISION_MODULES = ("cv2", "numpy", "inference")
+
+
+def parse_importtime(stderr):
+    """[(depth, module, cumulative microseconds)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        if not cum.strip().isdigit():
+            continue  # header line
+        # Nested imports are indented by two spaces per level after the separating one
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((depth, name.strip(), int(cum)))
+    return entries
+
+
+def measure(statement, env):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    entries = parse_importtime(proc.stderr)
+
+    # A package shows up once, where it is first imported; its cumulative time includes its submodules
+    own = {name.split(".")[0] for depth, name, _ in entries if depth == 0}
+    packages = {}
+    for _, name, cum in entries:
+        top = name.split(".")[0]
+        if top not in own:
+            packages[top] = max(packages.get(top, 0), cum)
+
+    error = None
+    if proc.returncode != 0:
+        lines = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        error = (lines or ["failed"])[-1]
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(sum(cum for depth, _, cum in entries if depth == 0) / 1000, 1),
+        "vision": [name for name in VISION_MODULES if name in packages or name in own],
+        "heaviest": sorted(packages.items(), key=lambda kv: -kv[1])[:4],
+        "error": error,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import time per entry point.")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per entry point; the fastest is reported")
+    parser.add_argument("--without-key", action="store_true", help="run with ROBOFLOW_API_KEY unset")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.without_key:
+        env.pop("ROBOFLOW_API_KEY", None)
+
+    results = {}
+    for name, statement in ENTRY_POINTS.items():
+        runs = [measure(statement, env) for _ in range(args.repeat)]
+        results[name] = min(runs, key=lambda r: r["wall_ms"])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entry point':20}{'wall ms':>10}{'import ms':>11}  vision / heaviest imports")
+    for name, r in results.items():
+        if r["error"]:
+            print(f"{name:20}{'-':>10}{'-':>11}  FAILED: {r['error']}")
+            continue
+        heaviest = ", ".join(f"{mod} {us / 1000:.0f}ms" for mod, us in r["heaviest"])
+        print(f"{name:20}{r['wall_ms']:>10.1f}{r['import_ms']:>11.1f}  {'/'.join(r['vision']) or 'none'} | {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app, abort
 from datetime import datetime
 import os
-import base64
 import uuid
-from sqlalchemy import or_
-from models import db, Exercise, Competition, CompetitionAthlete, Series, Athlete, Image, Shot
-from scorer import score_image
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Exercise, Competition, CompetitionAthlete, Series, Athlete, Image, Session, bulk_insert_shots
 from config import OUTPUT_DIR
+from ingest import IngestError, decode_image, read_data_url, save_bytes
 
 competition_bp = Blueprint('competition', __name__)
 
@@ -63,6 +63,73 @@ def ensure_system_exercises():
     except Exception:
         db.session.rollback()
 
+def load_competition_tree(competition_id, with_shots=True):
+    """Load a competition with athletes, series, images (and shots) in a fixed number of queries.
+
+    Each level is fetched with one SELECT ... IN (...) instead of lazy loading
+    per parent, so the query count does not grow with athletes/series/images.
+    Returns None if the competition does not exist.
+    """
+    series_images = (
+        selectinload(Competition.athletes)
+        .selectinload(CompetitionAthlete.series)
+        .selectinload(Series.images)
+    )
+    options = [
+        joinedload(Competition.exercise),
+        selectinload(Competition.athletes).joinedload(CompetitionAthlete.athlete),
+        series_images.joinedload(Image.athlete),
+    ]
+    if with_shots:
+        options.append(series_images.selectinload(Image.shots))
+
+    return Competition.query.options(*options).filter(Competition.id == competition_id).one_or_none()
+
+def ensure_competition_series(competition):
+    """Add every missing Series (with its competition Session) for the competition's athletes.
+
+    Existing (competition_athlete_id, series_number) pairs are read in one
+    query; the missing sessions and series are then written with one
+    multi-row INSERT each. The caller commits. Returns the number of series created.
+    """
+    existing = {
+        (ca_id, number)
+        for ca_id, number in db.session.query(Series.competition_athlete_id, Series.series_number)
+        .join(CompetitionAthlete, Series.competition_athlete_id == CompetitionAthlete.id)
+        .filter(CompetitionAthlete.competition_id == competition.id)
+    }
+
+    missing = [
+        (comp_athlete.id, number)
+        for comp_athlete in competition.athletes
+        for number in range(1, competition.exercise.total_series + 1)
+        if (comp_athlete.id, number) not in existing
+    ]
+    if not missing:
+        return 0
+
+    # Same per-series session the Series before_insert listener would create
+    now = datetime.utcnow()
+    session_ids = db.session.execute(
+        insert(Session)
+        .values([{"mode": "competition", "name": f"Competition: {competition.name}", "started_at": now}] * len(missing))
+        .returning(Session.id)
+    ).scalars().all()
+    # RETURNING order is unspecified, but the new sessions are identical: any one-to-one pairing is right
+
+    db.session.execute(
+        insert(Series).values([
+            {
+                "competition_athlete_id": ca_id,
+                "series_number": number,
+                "status": "active",
+                "session_id": session_id,
+            }
+            for (ca_id, number), session_id in zip(missing, session_ids)
+        ])
+    )
+    return len(missing)
+
 # Routes
 
 @competition_bp.route('/')
@@ -177,12 +244,14 @@ def create_competition():
         # Add athletes
         for athlete_id in data['athlete_ids']:
             comp_athlete = CompetitionAthlete(
-                competition_id=competition.id,
+                competition=competition,
                 athlete_id=int(athlete_id)
             )
             db.session.add(comp_athlete)
         
         try:
+            db.session.flush()
+            ensure_competition_series(competition)
             db.session.commit()
             return jsonify({"success": True, "competition": competition.to_dict()})
         except Exception as e:
@@ -199,8 +268,23 @@ def create_competition():
 @competition_bp.route('/<int:competition_id>')
 def manage_competition(competition_id):
     """Manage a specific competition."""
-    competition = Competition.query.get_or_404(competition_id)
+    competition = load_competition_tree(competition_id, with_shots=False)
+    if competition is None:
+        abort(404)
+
+    # Normally a no-op: series are created with the competition
+    if ensure_competition_series(competition):
+        db.session.commit()
+        competition = load_competition_tree(competition_id, with_shots=False)
+
     competition_data = competition.to_dict()
+
+    # All series were loaded with the competition tree in a single query
+    series_by_key = {
+        (series.competition_athlete_id, series.series_number): series
+        for comp_athlete in competition.athletes
+        for series in comp_athlete.series
+    }
     
     # Get detailed athlete data with series
     athletes_data = []
@@ -210,20 +294,9 @@ def manage_competition(competition_id):
         # Add series details
         series_list = []
         for i in range(competition.exercise.total_series):
-            series = Series.query.filter_by(
-                competition_athlete_id=comp_athlete.id,
-                series_number=i + 1
-            ).first()
-            
-            if not series:
-                series = Series(
-                    competition_athlete_id=comp_athlete.id,
-                    series_number=i + 1
-                )
-                db.session.add(series)
-                db.session.commit()
-            
-            series_list.append(series.to_dict())
+            series = series_by_key.get((comp_athlete.id, i + 1))
+            if series:
+                series_list.append(series.to_dict())
         
         athlete_data['series'] = series_list
         athletes_data.append(athlete_data)
@@ -245,6 +318,8 @@ def start_competition(competition_id):
     competition.started_at = datetime.utcnow()
     
     try:
+        # Competitions created before series were materialized up front get them now
+        ensure_competition_series(competition)
         db.session.commit()
         return jsonify({"success": True, "competition": competition.to_dict()})
     except Exception as e:
@@ -339,12 +414,15 @@ def upload_image(series_id):
     
     upload_dir, snapshot_dir = get_upload_dirs()
     
+    # The body is kept in memory: stored as sent, decoded at most once, scored from the same buffer
+    img = None
+
     # Primary: multipart/form-data (same pattern as scoring/training)
     file = request.files.get("image")
     if file and file.filename:
+        img_data = file.read()
         filename = f"series_{series_id}_{uuid.uuid4().hex[:8]}_{file.filename}"
-        path = os.path.join(upload_dir, filename)
-        file.save(path)
+        path = save_bytes(img_data, os.path.join(upload_dir, filename))
         image_type = "upload"
     else:
         # Backward-compatible fallback: JSON base64 snapshot
@@ -353,31 +431,21 @@ def upload_image(series_id):
         if not data:
             return jsonify({"success": False, "error": "No image file provided"}), 400
 
-        if "," in data:
-            data = data.split(",")[1]
-
-        import cv2
-        import numpy as np
-
         try:
-            img_data = base64.b64decode(data)
-        except Exception:
-            return jsonify({"success": False, "error": "Invalid base64 image data"}), 400
-
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if img is None:
-            return jsonify({"success": False, "error": "Invalid image data"}), 400
+            img_data = read_data_url(data)
+            img = decode_image(img_data)
+        except IngestError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
 
         filename = f"series_{series_id}_{uuid.uuid4().hex[:8]}_snapshot.jpg"
-        path = os.path.join(snapshot_dir, filename)
-        cv2.imwrite(path, img)
+        path = save_bytes(img_data, os.path.join(snapshot_dir, filename))
         image_type = "snapshot"
     
     # Process image with scorer first (like training mode)
+    from scorer import score_image
+
     try:
-        result = score_image(path)
+        result = score_image(path, data=img_data, img=img)
         
         # Create image record following training mode pattern
         image = Image(
@@ -397,26 +465,8 @@ def upload_image(series_id):
         db.session.add(image)
         db.session.flush()  # get id
         
-        # Create shot records (mirror Training's safe access)
-        for i, shot_data in enumerate(result.get('shots', []) or []):
-            # scorer outputs differ slightly across modes; be defensive and follow Training's pattern
-            auto_score = shot_data.get('auto_score')
-            if auto_score is None:
-                auto_score = shot_data.get('score')
-
-            shot = Shot(
-                shot_index=shot_data.get('id') or (i + 1),
-                center_px=shot_data.get('center_px'),
-                dx_mm=shot_data.get('dx_mm') or 0,
-                dy_mm=shot_data.get('dy_mm') or 0,
-                dist_mm=shot_data.get('dist_mm') or 0,
-                bullet_radius_px=shot_data.get('bullet_radius_px') or 0,
-                auto_score=auto_score or 0,
-                final_score=shot_data.get('final_score', auto_score) if shot_data.get('final_score') is not None else auto_score,
-                metadata_json=shot_data,
-                image_id=image.id
-            )
-            db.session.add(shot)
+        # Create shot records (same bulk path as Training)
+        bulk_insert_shots(db.session, image, result.get('shots'))
         
         db.session.commit()
         
@@ -449,7 +499,9 @@ def get_series_images(series_id):
 @competition_bp.route('/competitions/<int:competition_id>/results')
 def competition_results(competition_id):
     """Get detailed results for a competition."""
-    competition = Competition.query.get_or_404(competition_id)
+    competition = load_competition_tree(competition_id)
+    if competition is None:
+        abort(404)
     
     results = {
         "competition": competition.to_dict(),
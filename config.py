@@ -10,8 +10,12 @@ load_dotenv()
 
 ROBOFLOW_API_KEY = os.getenv("ROBOFLOW_API_KEY")
 
-if not ROBOFLOW_API_KEY:
-    raise RuntimeError("ROBOFLOW_API_KEY is not set in environment variables")
+
+def require_api_key() -> str:
+    """Checked when the detection model is first loaded, so non-scoring entry points run without a key."""
+    if not ROBOFLOW_API_KEY:
+        raise RuntimeError("ROBOFLOW_API_KEY is not set in environment variables")
+    return ROBOFLOW_API_KEY
 
 # ============================================================
 # MODEL
@@ -20,6 +24,53 @@ if not ROBOFLOW_API_KEY:
 MODEL_ID = "shotdetect3-x79bc/3"
 CONF_THRESHOLD = 0.3
 
+# score_images(): images per model.infer() call and decode/render threads
+INFERENCE_BATCH_SIZE = 8
+BATCH_WORKERS = 4
+
+# Load the model inside create_app() instead of on the first scoring request
+WARM_UP_MODEL = os.getenv("WARM_UP_MODEL", "0").lower() in ("1", "true", "yes", "on")
+
+# ============================================================
+# PROCESSING QUEUE
+# ============================================================
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))        # scoring jobs running at once
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))  # waiting jobs before /process answers 503
+JOB_KEEP_SECONDS = 600                                   # how long finished results stay fetchable
+
+# ============================================================
+# DATABASE
+# ============================================================
+
+# Applied to every SQLite connection (see models.configure_sqlite_connection).
+# WAL lets analytics reads run alongside an upload's write; journal_mode is stored
+# in the database file, so turning SQLITE_TUNING off later leaves an existing file in WAL.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1").lower() in ("1", "true", "yes", "on")
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",           # with WAL, durable except for the last commits on power loss
+    "cache_size": -32000,              # negative = KiB: 32 MB page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,              # ms a writer waits for the lock before "database is locked"
+} if SQLITE_TUNING else {}
+
+# Connections kept open for request threads and scoring workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+DB_POOL_TIMEOUT = 30  # seconds a thread waits for a free connection
+
+# ============================================================
+# ANALYTICS
+# ============================================================
+
+# /analytics/data responses per filter set; every write to the data they show, from any process, invalidates them
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "64"))
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))  # seconds, 0 disables the cache
+
+# Default cap on shot-distribution scatter points (?max_points=0 returns every shot)
+ANALYTICS_SCATTER_MAX_POINTS = 2000
+
 # ============================================================
 # PATHS
 # ============================================================
@@ -30,6 +81,14 @@ CONF_THRESHOLD = 0.3
 # For Flask - WEB APP
 OUTPUT_DIR = "static/out"
 
+# Scoring results cached by image content (see result_cache.py)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1").lower() in ("1", "true", "yes", "on")
+RESULT_CACHE_PATH = "instance/result_cache.sqlite"
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# When scored/ideal/overlay images are drawn: "eager", "background" or "lazy"
+RENDER_MODE = os.getenv("RENDER_MODE", "eager")
+
 
 # ============================================================
 # ISSF TARGET CONFIG
@@ -0,0 +1,43 @@
+import base64
+import binascii
+
+# ============================================================
+# UPLOAD INGEST
+# ============================================================
+#
+# Upload endpoints keep the request body in memory: the original encoded
+# bytes are written to disk as sent (no decode/re-encode round trip) and the
+# same buffer is decoded at most once and handed to scoring.
+
+
+class IngestError(ValueError):
+    """The request did not carry a usable image; endpoints answer 400."""
+
+
+def read_data_url(data: str) -> bytes:
+    """Bytes of a base64 image, with or without its 'data:image/...;base64,' prefix."""
+    if "," in data:
+        data = data.split(",", 1)[1]
+    try:
+        return base64.b64decode(data)
+    except (binascii.Error, ValueError):
+        raise IngestError("Invalid base64 image data")
+
+
+def decode_image(data):
+    """BGR array of encoded image bytes; np.frombuffer shares the buffer instead of copying it."""
+    import cv2
+    import numpy as np
+
+    buf = memoryview(data)
+    # imdecode asserts on an empty buffer instead of returning None
+    img = cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), cv2.IMREAD_COLOR) if buf.nbytes else None
+    if img is None:
+        raise IngestError("Invalid image data")
+    return img
+
+
+def save_bytes(data, path: str) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+# ============================================================
+# IN-PROCESS JOB QUEUE
+# ============================================================
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when the pending backlog is at capacity."""
+
+
+class Job:
+    """A unit of work tracked by id; status moves queued -> running -> done/failed."""
+
+    def __init__(self, fn, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Bounded FIFO of jobs served by a fixed pool of daemon worker threads.
+
+    At most `workers` jobs run at once and at most `max_pending` wait behind
+    them; submit() raises QueueFull beyond that so callers can push back on
+    the client instead of piling up work. Finished jobs are kept for
+    `keep_seconds` so clients can still fetch the result.
+    """
+
+    def __init__(self, workers=2, max_pending=16, keep_seconds=600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+
+        self._pending = deque()
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _ensure_workers(self):
+        # Started lazily so importing/creating the app does not spawn threads
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._run, name=f"job-worker-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn, *args, **kwargs) -> Job:
+        job = Job(fn, args, kwargs)
+        with self._cond:
+            self._prune()
+            if len(self._pending) >= self.max_pending:
+                raise QueueFull("Processing queue is full, try again shortly")
+            self._ensure_workers()
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        stale = [jid for jid, j in self._jobs.items() if j.finished_at and j.finished_at < cutoff]
+        for jid in stale:
+            del self._jobs[jid]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                job.status = "running"
+
+            try:
+                job.result = job._fn(*job._args, **job._kwargs)
+                job.status = "done"
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                job._fn = job._args = job._kwargs = None
+                job._done.set()
@@ -3,8 +3,13 @@ import sys
 import cv2
 import math
 import json
+import glob
+import time
+import hashlib
+import argparse
+import multiprocessing
 import numpy as np
-from inference import get_model
+from model_registry import get_model
 
 from config import *
 
@@ -176,10 +181,131 @@ def score_image(path):
         "total_score":total
     }
 
+# ============================================================
+# BATCH (directories / globs -> NDJSON)
+# ============================================================
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+def iter_images(sources):
+    """Yield image paths from directories (recursive), globs and plain files."""
+    for src in sources:
+        if os.path.isdir(src):
+            for root, dirs, files in os.walk(src):
+                dirs.sort()
+                for f in sorted(files):
+                    if f.lower().endswith(IMAGE_EXTS):
+                        yield os.path.join(root, f)
+        else:
+            for p in sorted(glob.glob(src, recursive=True)):
+                if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTS):
+                    yield p
+
+def load_manifest(path):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+_done_hashes = frozenset()
+_render_mode = None
+
+def _init_worker(done_hashes, render_mode):
+    # Each worker process loads the model once and keeps it for all its files
+    global _done_hashes, _render_mode
+    _done_hashes = done_hashes
+    _render_mode = render_mode
+    get_model(MODEL_ID)
+
+def _process_file(path):
+    import scorer
+
+    rec = {"path": path, "sha256": None, "result": None, "error": None}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        rec["sha256"] = hashlib.sha256(data).hexdigest()
+        if rec["sha256"] in _done_hashes:
+            return rec, True
+        # Directories often reuse file names (a/IMG_1.jpg, b/IMG_1.jpg): name the outputs by content
+        name = rec["sha256"][:16] + os.path.splitext(path)[1]
+        rec["result"] = scorer.score_image(path, render_mode=_render_mode, data=data, name=name)
+    except Exception as e:
+        rec["error"] = str(e)
+    return rec, False
+
+def run_batch(sources, out, manifest_path=None, workers=None, render=True):
+    """
+    Score every image under `sources` on a pool of worker processes and
+    write one JSON line per image to `out` as soon as it is done.
+    Hashes of successfully scored files are appended to `manifest_path`;
+    files whose hash is already listed there are skipped on the next run.
+    Artifacts are named after the first 16 hex digits of that hash.
+    """
+    done = frozenset(load_manifest(manifest_path))
+    workers = workers or os.cpu_count() or 1
+    render_mode = "eager" if render else "lazy"
+    stats = {"scored": 0, "skipped": 0, "failed": 0}
+    started = time.time()
+
+    # Render specs are written even with --no-render; a fresh checkout has no output dir yet
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    manifest = open(manifest_path, "a", encoding="utf-8") if manifest_path else None
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(done, render_mode)) as pool:
+            for rec, skipped in pool.imap_unordered(_process_file, iter_images(sources), chunksize=4):
+                if skipped:
+                    stats["skipped"] += 1
+                    continue
+
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()
+
+                if rec["error"]:
+                    stats["failed"] += 1
+                else:
+                    stats["scored"] += 1
+                    if manifest:
+                        manifest.write(rec["sha256"] + "\n")
+                        manifest.flush()
+
+                n = stats["scored"] + stats["failed"]
+                print(f"\r{n} processed, {stats['skipped']} skipped, {stats['failed']} failed "
+                      f"({n / max(time.time() - started, 1e-6):.1f} img/s)", end="", file=sys.stderr)
+    finally:
+        if manifest:
+            manifest.close()
+    print(file=sys.stderr)
+    return stats
+
 # ============================================================
 # RUN
 # ============================================================
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score ISSF target photos.")
+    parser.add_argument("sources", nargs="+", help="image file, or directories/globs with --batch")
+    parser.add_argument("--batch", action="store_true", help="score many images, writing NDJSON")
+    parser.add_argument("-o", "--out", help="NDJSON output file (appended to; default stdout)")
+    parser.add_argument("--manifest", help="file of processed image hashes used to resume (default <out>.manifest)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-render", action="store_true", help="skip drawing scored/ideal/overlay images")
+    args = parser.parse_args(argv)
+
+    if not args.batch:
+        res = score_image(args.sources[0])
+        print(json.dumps(res,indent=2,ensure_ascii=False))
+        return
+
+    manifest = args.manifest or (args.out + ".manifest" if args.out else None)
+    out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+    try:
+        stats = run_batch(args.sources, out, manifest, args.workers, render=not args.no_render)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(stats), file=sys.stderr)
+
 if __name__=="__main__":
-    res = score_image(sys.argv[1])
-    print(json.dumps(res,indent=2,ensure_ascii=False))
+    main()
@@ -0,0 +1,263 @@
+"""Versioned schema migrations for shooting.db.
+
+The applied version is recorded in the `schema_version` table, so a
+current database costs create_app() a single query. Pending migrations
+run in order inside one write transaction (BEGIN IMMEDIATE, so workers
+starting together wait for each other). A failing migration rolls
+everything back and raises MigrationError, so the app does not start on
+a half-migrated schema.
+
+A fresh database gets the current schema from db.create_all() and is
+stamped as up to date. To change the schema, add the column/table to
+models.py (for new databases) and append a migration here (for existing
+ones).
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import column, insert, table
+from sqlalchemy.exc import OperationalError
+
+from models import db, ensure_indexes, rebuild_rollups, refresh_score_totals
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def _columns(conn, tbl: str) -> set:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info('{tbl}')")}
+
+
+def _add_missing_columns(conn, tbl: str, expected) -> set:
+    """ALTER TABLE ... ADD COLUMN for every (name, type) in `expected` the table lacks; returns the added names."""
+    existing = _columns(conn, tbl)
+    added = {name for name, _ in expected if name not in existing}
+    for name, ctype in expected:
+        if name in added:
+            conn.exec_driver_sql(f"ALTER TABLE {tbl} ADD COLUMN {name} {ctype}")
+    return added
+
+
+# ============================================================
+# MIGRATIONS
+# ============================================================
+
+def legacy_columns(conn):
+    """Columns added to shots/images/sessions/shot_revisions/series before versioning existed."""
+    shots = _columns(conn, "shots")
+    # Legacy databases named the shot position `shot_index`; the model maps it to `idx`
+    if "idx" not in shots and "shot_index" in shots:
+        conn.exec_driver_sql("ALTER TABLE shots ADD COLUMN idx INTEGER DEFAULT 0")
+        conn.exec_driver_sql("UPDATE shots SET idx = shot_index")
+    _add_missing_columns(conn, "shots", [
+        ("idx", "INTEGER DEFAULT 0"),
+        ("center_px", "JSON"),
+        ("dx_mm", "REAL DEFAULT 0"),
+        ("dy_mm", "REAL DEFAULT 0"),
+        ("dist_mm", "REAL DEFAULT 0"),
+        ("bullet_radius_px", "REAL DEFAULT 0"),
+        ("auto_score", "INTEGER DEFAULT 0"),
+        ("final_score", "INTEGER"),
+        ("metadata_json", "JSON"),
+        ("created_at", "DATETIME"),
+    ])
+    conn.exec_driver_sql("UPDATE shots SET idx = 0 WHERE idx IS NULL")
+
+    _add_missing_columns(conn, "images", [
+        ("overlay_path", "TEXT"),
+        ("scored_path", "TEXT"),
+        ("ideal_path", "TEXT"),
+        ("created_at", "DATETIME"),
+        ("athlete_id", "INTEGER"),
+        ("series_id", "INTEGER REFERENCES series(id)"),
+    ])
+    _add_missing_columns(conn, "sessions", [
+        ("mode", "TEXT DEFAULT 'training'"),
+        ("started_at", "DATETIME"),
+        ("finished_at", "DATETIME"),
+        ("name", "TEXT"),
+    ])
+    _add_missing_columns(conn, "shot_revisions", [
+        ("prev_score", "INTEGER DEFAULT 0"),
+        ("new_score", "INTEGER DEFAULT 0"),
+        ("note", "TEXT"),
+        ("changed_at", "DATETIME"),
+    ])
+
+    if _add_missing_columns(conn, "series", [("session_id", "INTEGER NOT NULL DEFAULT 0")]):
+        _backfill_series_sessions(conn)
+
+    _backfill_timestamps(conn)
+
+
+def _backfill_timestamps(conn):
+    """Timestamps the models declare NOT NULL but ALTER TABLE left NULL on existing rows."""
+    # Each row borrows the closest related timestamp, falling back to the migration time
+    conn.exec_driver_sql(
+        """
+        UPDATE images SET created_at = COALESCE(
+            (SELECT started_at FROM sessions WHERE sessions.id = images.session_id), CURRENT_TIMESTAMP
+        )
+        WHERE created_at IS NULL
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        UPDATE sessions SET started_at = COALESCE(
+            (SELECT MIN(created_at) FROM images WHERE images.session_id = sessions.id), CURRENT_TIMESTAMP
+        )
+        WHERE started_at IS NULL
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        UPDATE shots SET created_at = COALESCE(
+            (SELECT created_at FROM images WHERE images.id = shots.image_id), CURRENT_TIMESTAMP
+        )
+        WHERE created_at IS NULL
+        """
+    )
+    conn.exec_driver_sql("UPDATE shot_revisions SET changed_at = CURRENT_TIMESTAMP WHERE changed_at IS NULL")
+
+
+def _backfill_series_sessions(conn):
+    """Give every series without a session its own competition session, as the Series listener does."""
+    rows = conn.exec_driver_sql(
+        """
+        SELECT s.id, c.name, COALESCE(c.created_at, CURRENT_TIMESTAMP)
+        FROM series s
+        JOIN competition_athletes ca ON ca.id = s.competition_athlete_id
+        JOIN competitions c ON c.id = ca.competition_id
+        WHERE s.session_id = 0
+        ORDER BY s.id
+        """
+    ).fetchall()
+    sessions = table(
+        "sessions", column("id"), column("mode"), column("name"), column("started_at"), column("finished_at")
+    )
+    for start in range(0, len(rows), 500):
+        chunk = rows[start:start + 500]
+        waiting = defaultdict(list)
+        for series_id, name, started_at in chunk:
+            waiting[(f"Competition: {name}", started_at)].append(series_id)
+        returned = conn.execute(
+            insert(sessions)
+            .values([
+                {"mode": "competition", "name": f"Competition: {name}", "started_at": started_at, "finished_at": None}
+                for _, name, started_at in chunk
+            ])
+            .returning(sessions.c.id, sessions.c.name, sessions.c.started_at)
+        ).fetchall()
+        # RETURNING order is unspecified: pair by content, sessions with equal values are interchangeable
+        conn.exec_driver_sql(
+            "UPDATE series SET session_id = ? WHERE id = ?",
+            [(session_id, waiting[(name, started_at)].pop()) for session_id, name, started_at in returned],
+        )
+
+
+def score_totals(conn):
+    """Denormalized total_score/shots_count on images and series, backfilled from shots."""
+    added = set()
+    for tbl in ("images", "series"):
+        added |= _add_missing_columns(conn, tbl, [
+            ("total_score", "INTEGER NOT NULL DEFAULT 0"),
+            ("shots_count", "INTEGER NOT NULL DEFAULT 0"),
+        ])
+    if added:
+        refresh_score_totals(conn)
+
+
+def analytics_rollups(conn):
+    """Fill athlete_day_stats/shot_heat_stats (created empty by create_all) from existing images."""
+    rebuild_rollups(conn)
+
+
+def model_indexes(conn):
+    """Indexes declared on the models that tables created before them lack."""
+    ensure_indexes(conn)
+
+
+def shared_cache_generation(conn):
+    """analytics_generation table (created by create_all); nothing to backfill."""
+
+
+# (version, migration); append only, never renumber
+MIGRATIONS = [
+    (1, legacy_columns),
+    (2, score_totals),
+    (3, analytics_rollups),
+    (4, model_indexes),
+    (5, shared_cache_generation),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+def current_version(conn) -> int:
+    try:
+        return conn.exec_driver_sql("SELECT MAX(version) FROM schema_version").scalar() or 0
+    except OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        return 0
+
+
+def migrate(engine) -> int:
+    """Bring the database to LATEST_VERSION; returns the version it was at before."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version == LATEST_VERSION:
+        return version
+    if version > LATEST_VERSION:
+        raise MigrationError(f"Database schema version {version} is newer than this code ({LATEST_VERSION})")
+
+    with engine.connect() as conn:
+        # pysqlite only opens transactions before DML; take over so the DDL is transactional too
+        driver = conn.connection.driver_connection
+        driver.isolation_level = None
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                version = _migrate(conn)
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            driver.isolation_level = ""
+    return version
+
+
+def _migrate(conn) -> int:
+    # Re-read under the write lock: another worker may have migrated meanwhile
+    version = current_version(conn)
+    fresh = not conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images'").first()
+
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    # New tables get the current model definition, including their indexes
+    db.metadata.create_all(conn)
+
+    for number, migration in MIGRATIONS:
+        if number <= version:
+            continue
+        if not fresh:
+            try:
+                migration(conn)
+            except Exception as e:
+                raise MigrationError(f"Schema migration {number} ({migration.__name__}) failed: {e}") from e
+        conn.exec_driver_sql(
+            "INSERT INTO schema_version (version, name) VALUES (?, ?)", (number, migration.__name__)
+        )
+    return version
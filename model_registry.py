@@ -0,0 +1,84 @@
+import threading
+
+from config import MODEL_ID, require_api_key
+
+# ============================================================
+# MODEL REGISTRY
+# ============================================================
+
+def _load_model(model_id):
+    # `inference` takes seconds to import; pay for it with the first model load, not at startup
+    from inference import get_model
+
+    require_api_key()
+    return get_model(model_id)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded inference models keyed by model id.
+
+    Models are loaded lazily on first access and kept for the lifetime of the
+    process. Loading is guarded by a per-model lock so concurrent requests for
+    a cold model trigger exactly one load.
+    """
+
+    def __init__(self, loader=_load_model):
+        self._loader = loader
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_for(self, model_id):
+        with self._lock:
+            return self._locks.setdefault(model_id, threading.Lock())
+
+    def get(self, model_id=MODEL_ID):
+        model = self._models.get(model_id)
+        if model is not None:
+            return model
+
+        with self._lock_for(model_id):
+            model = self._models.get(model_id)
+            if model is None:
+                model = self._loader(model_id)
+                self._models[model_id] = model
+            return model
+
+    def reload(self, model_id=MODEL_ID):
+        """Load a fresh instance and swap it in; in-flight callers keep the old one."""
+        with self._lock_for(model_id):
+            model = self._loader(model_id)
+            self._models[model_id] = model
+            return model
+
+    def evict(self, model_id=None):
+        """Drop one model (or all of them when model_id is None)."""
+        with self._lock:
+            if model_id is None:
+                self._models.clear()
+            else:
+                self._models.pop(model_id, None)
+
+    def loaded(self):
+        return list(self._models.keys())
+
+
+registry = ModelRegistry()
+
+
+def get_model(model_id=MODEL_ID):
+    return registry.get(model_id)
+
+
+def warm_up(model_id=MODEL_ID):
+    """Load the model ahead of the first scoring request."""
+    return registry.get(model_id)
+
+
+def reload_model(model_id=MODEL_ID):
+    return registry.reload(model_id)
+
+
+def evict_model(model_id=None):
+    registry.evict(model_id)
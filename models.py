@@ -147,6 +147,11 @@ class Session(db.Model):
     """
 
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Session lists by mode, newest first; active lists (finished_at IS NULL) use the second
+        db.Index("ix_sessions_mode_started", "mode", "started_at"),
+        db.Index("ix_sessions_mode_finished_started", "mode", "finished_at", "started_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=True)
@@ -165,6 +170,13 @@ class Image(db.Model):
     """An uploaded image belonging to a session with processing results."""
 
     __tablename__ = "images"
+    __table_args__ = (
+        db.Index("ix_images_session_id", "session_id"),
+        db.Index("ix_images_series_id", "series_id"),
+        # Analytics date-range and athlete filters
+        db.Index("ix_images_created_at", "created_at"),
+        db.Index("ix_images_athlete_created", "athlete_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(250), nullable=False)
@@ -186,6 +198,10 @@ class Image(db.Model):
 
     shots = db.relationship("Shot", back_populates="image", cascade="all, delete-orphan")
 
+    # Denormalized aggregates over `shots`, maintained by the Shot event listeners below
+    cached_total_score = db.Column("total_score", db.Integer, nullable=False, default=0, server_default="0")
+    cached_shots_count = db.Column("shots_count", db.Integer, nullable=False, default=0, server_default="0")
+
     def __init__(self, **kwargs):
         """Override init to automatically set session_id from series if provided."""
         super().__init__(**kwargs)
@@ -197,10 +213,10 @@ class Image(db.Model):
             pass
 
     def shots_count(self) -> int:
-        return len(self.shots)
+        return self.cached_shots_count or 0
 
     def total_score(self) -> int:
-        return sum(s.final_score if s.final_score is not None else s.auto_score for s in self.shots)
+        return self.cached_total_score or 0
 
     def to_dict(self) -> dict:
         return {
@@ -223,6 +239,7 @@ class Shot(db.Model):
     """A single detected shot on an image."""
 
     __tablename__ = "shots"
+    __table_args__ = (db.Index("ix_shots_image_id", "image_id", "idx"),)
 
     id = db.Column(db.Integer, primary_key=True)
     # Map attribute `shot_index` to existing DB column `idx` for compatibility
@@ -421,23 +438,21 @@ class Series(db.Model):
     session = db.relationship("Session", backref="series")
     
     images = db.relationship("Image", backref="series", cascade="all, delete-orphan")
+
+    # Denormalized aggregates over the shots of `images`, maintained by the Shot event listeners
+    cached_total_score = db.Column("total_score", db.Integer, nullable=False, default=0, server_default="0")
+    cached_shots_count = db.Column("shots_count", db.Integer, nullable=False, default=0, server_default="0")
     
     def __repr__(self) -> str:
         return f"<Series {self.series_number} for {self.competition_athlete.athlete.first_name}>"
     
     def get_total_score(self) -> int:
-        """Calculate total score from all images in this series."""
-        total = 0
-        for image in self.images:
-            total += image.total_score()
-        return total
+        """Total score from all images in this series."""
+        return self.cached_total_score or 0
     
     def get_shots_count(self) -> int:
-        """Get total number of shots across all images in this series."""
-        count = 0
-        for image in self.images:
-            count += image.shots_count()
-        return count
+        """Total number of shots across all images in this series."""
+        return self.cached_shots_count or 0
     
     def to_dict(self) -> dict:
         return {
@@ -454,6 +469,50 @@ class Series(db.Model):
         }
 
 
+class AthleteDayStats(db.Model):
+    """Rollup of image totals per (athlete, day, session mode) for analytics."""
+
+    __tablename__ = "athlete_day_stats"
+    __table_args__ = (db.Index("ix_athlete_day_stats_key", "athlete_id", "day", "mode"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    athlete_id = db.Column(db.Integer, nullable=True)  # NULL for unassigned images
+    day = db.Column(db.Date, nullable=False)
+    mode = db.Column(db.String(50), nullable=False)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    shots = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_min = db.Column(db.Integer, nullable=False, default=0)
+    score_max = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ShotHeatStats(db.Model):
+    """Shot counts per (athlete, day, session mode, shot index, score) for the analytics heatmap."""
+
+    __tablename__ = "shot_heat_stats"
+    __table_args__ = (db.Index("ix_shot_heat_stats_key", "athlete_id", "day", "mode"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    athlete_id = db.Column(db.Integer, nullable=True)
+    day = db.Column(db.Date, nullable=False)
+    mode = db.Column(db.String(50), nullable=False)
+
+    shot_index = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    shots = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalyticsGeneration(db.Model):
+    """Single-row counter bumped in every transaction that changes analytics data; keys the response cache."""
+
+    __tablename__ = "analytics_generation"
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
 # ---------------------------------------------------------------------------
 # SQLAlchemy Event Listeners for Data Integrity
 # ---------------------------------------------------------------------------
@@ -509,3 +568,423 @@ def set_series_session_id(mapper, connection, target):
         else:
             raise ValueError(f"CompetitionAthlete with id {target.competition_athlete_id} not found")
 
+
+
+# ---------------------------------------------------------------------------
+# Score aggregates (images/series total_score + shots_count)
+# ---------------------------------------------------------------------------
+#
+# Maintained by ORM events: shot inserts/updates/deletes (including the
+# cascade when an Image is deleted through the session) and moving an
+# Image to another series. Writes that skip those events - Query.delete()
+# / Query.update(), raw SQL, insert(Shot) without bulk_insert_shots() -
+# must call refresh_score_totals() themselves.
+
+def _effective_score(shot) -> int:
+    return shot.final_score if shot.final_score is not None else (shot.auto_score or 0)
+
+
+def _apply_shot_delta(connection, image_id, score_delta, count_delta):
+    params = {"image_id": image_id, "ds": score_delta, "dc": count_delta}
+    connection.execute(
+        db.text("""
+            UPDATE images
+            SET total_score = total_score + :ds, shots_count = shots_count + :dc
+            WHERE id = :image_id
+        """),
+        params,
+    )
+    connection.execute(
+        db.text("""
+            UPDATE series
+            SET total_score = total_score + :ds, shots_count = shots_count + :dc
+            WHERE id = (SELECT series_id FROM images WHERE id = :image_id)
+        """),
+        params,
+    )
+
+
+def refresh_score_totals(connection, image_ids=None):
+    """
+    Recompute image and series aggregates from `shots` (all rows when image_ids is None).
+    Run after bulk writes that bypass the ORM events, or by hand via rebuild_rollups.py.
+    """
+    if image_ids is not None:
+        image_ids = sorted({i for i in image_ids if i})
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(image_ids), 500):
+            _refresh_score_totals(connection, image_ids[start:start + 500])
+        return
+    _refresh_score_totals(connection, None)
+
+
+def _refresh_score_totals(connection, image_ids):
+    image_filter = ""
+    series_filter = ""
+    params = {}
+    if image_ids is not None:
+        placeholders = ", ".join(f":i{n}" for n in range(len(image_ids)))
+        params = {f"i{n}": i for n, i in enumerate(image_ids)}
+        image_filter = f"WHERE id IN ({placeholders})"
+        series_filter = f"WHERE id IN (SELECT series_id FROM images WHERE id IN ({placeholders}))"
+
+    connection.execute(
+        db.text(f"""
+            UPDATE images SET
+                total_score = (SELECT COALESCE(SUM(COALESCE(final_score, auto_score, 0)), 0)
+                               FROM shots WHERE shots.image_id = images.id),
+                shots_count = (SELECT COUNT(*) FROM shots WHERE shots.image_id = images.id)
+            {image_filter}
+        """),
+        params,
+    )
+    connection.execute(
+        db.text(f"""
+            UPDATE series SET
+                total_score = (SELECT COALESCE(SUM(total_score), 0) FROM images WHERE images.series_id = series.id),
+                shots_count = (SELECT COALESCE(SUM(shots_count), 0) FROM images WHERE images.series_id = series.id)
+            {series_filter}
+        """),
+        params,
+    )
+
+
+@event.listens_for(Shot, 'after_insert')
+def shot_inserted(mapper, connection, target):
+    """Add a new shot to its image/series totals in the same transaction."""
+    _apply_shot_delta(connection, target.image_id, _effective_score(target), 1)
+
+
+@event.listens_for(Shot, 'after_update')
+def shot_updated(mapper, connection, target):
+    """Recompute totals of the affected image(s) when a score or the owning image changes."""
+    from sqlalchemy import inspect
+
+    attrs = inspect(target).attrs
+    if not any(attrs[name].history.has_changes() for name in ("final_score", "auto_score", "image_id")):
+        return
+    image_ids = {target.image_id, *attrs.image_id.history.deleted}
+    refresh_score_totals(connection, image_ids)
+
+
+@event.listens_for(Shot, 'before_delete')
+def shot_deleted(mapper, connection, target):
+    """Remove a shot from its image/series totals; runs before the row disappears."""
+    _apply_shot_delta(connection, target.image_id, -_effective_score(target), -1)
+
+
+@event.listens_for(Image, 'before_update')
+def image_series_changed(mapper, connection, target):
+    """Move the image's totals from its old series to the new one when series_id changes."""
+    from sqlalchemy import inspect
+
+    if not inspect(target).attrs.series_id.history.has_changes():
+        return
+    # The row still holds the old series and the totals of the shots flushed so far
+    old = connection.execute(
+        db.text("SELECT series_id FROM images WHERE id = :image_id"), {"image_id": target.id}
+    ).scalar()
+    if old == target.series_id:
+        return
+    params = {"image_id": target.id, "old": old, "new": target.series_id}
+    for series_key, sign in (("old", "-"), ("new", "+")):
+        if params[series_key] is None:
+            continue
+        connection.execute(
+            db.text(f"""
+                UPDATE series SET
+                    total_score = total_score {sign} (SELECT total_score FROM images WHERE id = :image_id),
+                    shots_count = shots_count {sign} (SELECT shots_count FROM images WHERE id = :image_id)
+                WHERE id = :{series_key}
+            """),
+            params,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Analytics rollups (athlete_day_stats + shot_heat_stats)
+# ---------------------------------------------------------------------------
+#
+# Both tables are keyed by (athlete_id, day, mode). Writes only mark the
+# affected images; after the flush every touched key is recomputed from
+# `images` (whose totals are already up to date) and `shots`, so the rows
+# stay exact without tracking per-shot deltas.
+
+def _rollup_inserts(where: str = "") -> list:
+    # `day` is NOT NULL; images without a timestamp (legacy rows) have no day to count under
+    where = "WHERE i.created_at IS NOT NULL " + where
+    return [
+        db.text(f"""
+            INSERT INTO athlete_day_stats
+                (athlete_id, day, mode, attempts, shots, score_sum, score_sq_sum, score_min, score_max)
+            SELECT i.athlete_id, date(i.created_at), s.mode, COUNT(*), SUM(i.shots_count),
+                   SUM(i.total_score), SUM(i.total_score * i.total_score), MIN(i.total_score), MAX(i.total_score)
+            FROM images i JOIN sessions s ON s.id = i.session_id
+            {where}
+            GROUP BY i.athlete_id, date(i.created_at), s.mode
+        """),
+        db.text(f"""
+            INSERT INTO shot_heat_stats (athlete_id, day, mode, shot_index, score, shots)
+            SELECT i.athlete_id, date(i.created_at), s.mode, COALESCE(sh.idx, 0),
+                   COALESCE(sh.final_score, sh.auto_score, 0), COUNT(*)
+            FROM shots sh
+            JOIN images i ON i.id = sh.image_id
+            JOIN sessions s ON s.id = i.session_id
+            {where}
+            GROUP BY i.athlete_id, date(i.created_at), s.mode, COALESCE(sh.idx, 0),
+                     COALESCE(sh.final_score, sh.auto_score, 0)
+        """),
+    ]
+
+
+_KEY_WHERE = """
+    AND i.athlete_id IS :athlete_id AND s.mode = :mode
+      AND i.created_at >= :day AND i.created_at < date(:day, '+1 day')
+"""
+
+
+def rollup_keys(connection, image_ids) -> set:
+    """(athlete_id, day, mode) keys of the given images."""
+    image_ids = sorted({i for i in image_ids if i})
+    keys = set()
+    for start in range(0, len(image_ids), 500):
+        chunk = image_ids[start:start + 500]
+        placeholders = ", ".join(f":i{n}" for n in range(len(chunk)))
+        rows = connection.execute(
+            db.text(f"""
+                SELECT DISTINCT i.athlete_id, date(i.created_at), s.mode
+                FROM images i JOIN sessions s ON s.id = i.session_id
+                WHERE i.id IN ({placeholders}) AND i.created_at IS NOT NULL
+            """),
+            {f"i{n}": i for n, i in enumerate(chunk)},
+        )
+        keys.update(tuple(r) for r in rows)
+    return keys
+
+
+def refresh_rollups(connection, image_ids=(), keys=()):
+    """Recompute the rollup rows of the given images and/or explicit (athlete_id, day, mode) keys."""
+    keys = set(keys) | rollup_keys(connection, image_ids)
+    inserts = _rollup_inserts(_KEY_WHERE)
+    for athlete_id, day, mode in keys:
+        params = {"athlete_id": athlete_id, "day": day, "mode": mode}
+        for table in ("athlete_day_stats", "shot_heat_stats"):
+            connection.execute(
+                db.text(f"DELETE FROM {table} WHERE athlete_id IS :athlete_id AND day = :day AND mode = :mode"),
+                params,
+            )
+        for stmt in inserts:
+            connection.execute(stmt, params)
+
+
+def rebuild_rollups(connection):
+    """Recompute both rollup tables from scratch."""
+    connection.execute(db.text("DELETE FROM athlete_day_stats"))
+    connection.execute(db.text("DELETE FROM shot_heat_stats"))
+    for stmt in _rollup_inserts():
+        connection.execute(stmt)
+
+
+def _mark_rollup_images(target, *image_ids):
+    from sqlalchemy.orm import object_session
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("rollup_images", set()).update(i for i in image_ids if i)
+
+
+def _mark_rollup_keys(target, connection, image_id):
+    # Capture the key while the image row still holds its old values
+    from sqlalchemy.orm import object_session
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("rollup_keys", set()).update(rollup_keys(connection, [image_id]))
+
+
+@event.listens_for(Image, 'after_insert')
+def image_inserted_rollup(mapper, connection, target):
+    _mark_rollup_images(target, target.id)
+
+
+@event.listens_for(Image, 'before_update')
+def image_updated_rollup(mapper, connection, target):
+    from sqlalchemy import inspect
+
+    attrs = inspect(target).attrs
+    if any(attrs[name].history.has_changes() for name in ("athlete_id", "created_at", "session_id")):
+        _mark_rollup_keys(target, connection, target.id)
+        _mark_rollup_images(target, target.id)
+
+
+@event.listens_for(Image, 'before_delete')
+def image_deleted_rollup(mapper, connection, target):
+    _mark_rollup_keys(target, connection, target.id)
+
+
+@event.listens_for(Shot, 'after_insert')
+@event.listens_for(Shot, 'after_delete')
+def shot_changed_rollup(mapper, connection, target):
+    _mark_rollup_images(target, target.image_id)
+
+
+@event.listens_for(Shot, 'after_update')
+def shot_updated_rollup(mapper, connection, target):
+    from sqlalchemy import inspect
+
+    _mark_rollup_images(target, target.image_id, *inspect(target).attrs.image_id.history.deleted)
+
+
+from sqlalchemy.orm import Session as _OrmSession
+
+
+@event.listens_for(_OrmSession, 'after_flush')
+def flush_rollups(session, flush_context):
+    """Recompute the rollup keys touched by this flush, inside the same transaction."""
+    image_ids = session.info.pop("rollup_images", None)
+    keys = session.info.pop("rollup_keys", None)
+    if image_ids or keys:
+        refresh_rollups(session.connection(), image_ids or (), keys or ())
+
+
+# ---------------------------------------------------------------------------
+# Analytics cache generation
+# ---------------------------------------------------------------------------
+#
+# Cached /analytics responses are only served while this counter is
+# unchanged. It lives in the database so writes from any process (other
+# workers, rescore.py, rebuild_rollups.py) invalidate every cache.
+
+def analytics_generation(connection) -> int:
+    return connection.execute(db.text("SELECT value FROM analytics_generation WHERE id = 1")).scalar() or 0
+
+
+def bump_analytics_generation(connection):
+    """Call inside the writing transaction; readers see the new value together with the new rows."""
+    connection.execute(
+        db.text("""
+            INSERT INTO analytics_generation (id, value) VALUES (1, 1)
+            ON CONFLICT (id) DO UPDATE SET value = value + 1
+        """)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Bulk shot insertion
+# ---------------------------------------------------------------------------
+
+# Keys of a score_image() shot dict that are stored in Shot columns
+SHOT_COLUMN_KEYS = frozenset(
+    {"id", "shot_index", "center_px", "dx_mm", "dy_mm", "dist_mm", "bullet_radius_px", "score", "auto_score", "final_score"}
+)
+
+
+def shot_row(image_id, position, data) -> dict:
+    """Shot column values for one score_image() shot dict; `position` (1-based) stands in for a missing id."""
+    auto_score = data.get("auto_score")
+    if auto_score is None:
+        auto_score = data.get("score")
+    final_score = data.get("final_score")
+    row = {
+        "image_id": image_id,
+        "shot_index": data.get("id") or position,
+        "center_px": data.get("center_px"),
+        "dx_mm": data.get("dx_mm") or 0,
+        "dy_mm": data.get("dy_mm") or 0,
+        "dist_mm": data.get("dist_mm") or 0,
+        "bullet_radius_px": data.get("bullet_radius_px") or 0,
+        "auto_score": auto_score or 0,
+        "final_score": final_score if final_score is not None else auto_score,
+    }
+    # Left out rather than None when empty: the JSON type would store the text 'null'
+    extra = {key: value for key, value in data.items() if key not in SHOT_COLUMN_KEYS}
+    if extra:
+        row["metadata_json"] = extra
+    return row
+
+
+def bulk_insert_shots(session, image, shots) -> int:
+    """Insert score_image() shot dicts for a flushed `image` with one executemany.
+
+    Skips the per-object unit of work, so the image/series totals and the
+    rollups are updated here once for the whole batch. The image's own flush
+    already marks the analytics caches stale. Returns the number of shots.
+    """
+    from sqlalchemy import insert
+
+    rows = [shot_row(image.id, position, data) for position, data in enumerate(shots or [], start=1)]
+    if not rows:
+        return 0
+
+    session.execute(insert(Shot), rows)
+    connection = session.connection()
+    score = sum(row["final_score"] if row["final_score"] is not None else row["auto_score"] for row in rows)
+    _apply_shot_delta(connection, image.id, score, len(rows))
+    refresh_rollups(connection, [image.id])
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Indexes
+# ---------------------------------------------------------------------------
+
+def ensure_indexes(connection):
+    """Create every index declared on the models that the database lacks.
+
+    create_all() only builds indexes together with new tables, so databases
+    created before an index was declared get it here; safe to run on every start.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# ---------------------------------------------------------------------------
+# SQLite connection setup
+# ---------------------------------------------------------------------------
+
+class RegrSlope:
+    """SQLite aggregate regr_slope(y, x): least-squares slope of y over x, NULL for fewer than 2 points.
+
+    Uses running means and co-moments, so large x values (timestamps) do not lose precision.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.c_xy = 0.0
+        self.c_xx = 0.0
+
+    def step(self, y, x):
+        if x is None or y is None:
+            return
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        self.mean_y += (y - self.mean_y) / self.n
+        self.c_xy += dx * (y - self.mean_y)
+        self.c_xx += dx * (x - self.mean_x)
+
+    def finalize(self):
+        if self.n < 2 or self.c_xx == 0:
+            return None
+        return self.c_xy / self.c_xx
+
+
+from sqlalchemy.engine import Engine
+
+
+@event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Register the SQL functions above and apply config.SQLITE_PRAGMAS to each new SQLite connection."""
+    import sqlite3
+
+    from config import SQLITE_PRAGMAS
+
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_aggregate("regr_slope", 2, RegrSlope)
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
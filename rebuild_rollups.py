@@ -0,0 +1,39 @@
+"""Recompute the analytics rollup tables from images and shots.
+
+Usage:
+    python rebuild_rollups.py
+
+The rollups (athlete_day_stats, shot_heat_stats) are kept up to date on
+every ORM write; run this after editing the database by hand or to repair
+them. The image/series score totals they are built from are refreshed
+first.
+"""
+
+import json
+import time
+
+from models import bump_analytics_generation, rebuild_rollups, refresh_score_totals
+
+
+def main():
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        started = time.time()
+        with db.engine.begin() as conn:
+            refresh_score_totals(conn)
+            rebuild_rollups(conn)
+            # Running app processes drop their cached analytics responses
+            bump_analytics_generation(conn)
+            counts = {
+                table: conn.execute(db.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                for table in ("athlete_day_stats", "shot_heat_stats")
+            }
+    counts["seconds"] = round(time.time() - started, 2)
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
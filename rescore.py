@@ -0,0 +1,177 @@
+"""Re-score stored shots after ISSF_RADII_MM / BULLET_RADIUS_MM change.
+
+Usage:
+    python rescore.py [--chunk-size N] [--restart] [--dry-run]
+
+Shots are streamed in id order, scored from their stored dx_mm/dy_mm with
+the vectorized kernel and written back with one executemany UPDATE per
+chunk, each chunk in its own transaction. Shots whose score was revised by
+hand (a ShotRevision exists or final_score differs from auto_score) are left
+untouched. Progress is checkpointed to a state file so an interrupted run
+continues where it stopped; a run for a different ring configuration
+starts over.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from config import ISSF_RADII_MM, BULLET_RADIUS_MM
+from models import bump_analytics_generation, refresh_rollups, refresh_score_totals
+from scorer import score_offsets
+
+STATE_PATH = "instance/rescore_state.json"
+CHUNK_SIZE = 20000
+
+SELECT_CHUNK = text(
+    """
+    SELECT s.id, s.dx_mm, s.dy_mm, s.auto_score, s.final_score,
+           EXISTS (SELECT 1 FROM shot_revisions r WHERE r.shot_id = s.id) AS revised,
+           s.image_id
+    FROM shots s
+    WHERE s.id > :last_id
+    ORDER BY s.id
+    LIMIT :limit
+    """
+)
+
+UPDATE_SHOT = text(
+    """
+    UPDATE shots
+    SET auto_score = :score,
+        final_score = CASE WHEN final_score IS NULL THEN NULL ELSE :score END
+    WHERE id = :id
+    """
+)
+
+
+def geometry_fingerprint() -> str:
+    return json.dumps({"radii": sorted(ISSF_RADII_MM.items()), "bullet": BULLET_RADIUS_MM})
+
+
+def fresh_state(fingerprint):
+    return {"fingerprint": fingerprint, "last_id": 0, "scanned": 0, "updated": 0, "skipped_revised": 0}
+
+
+def load_state(path, fingerprint):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("fingerprint") == fingerprint and not state.get("finished"):
+            return state
+    except (OSError, ValueError):
+        pass
+    return fresh_state(fingerprint)
+
+
+def save_state(path, state):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def rescore_chunk(rows):
+    """Return (update params, touched image ids, number of revised rows skipped) for one chunk of SELECT_CHUNK rows."""
+    n = len(rows)
+    ids = np.fromiter((r[0] for r in rows), np.int64, n)
+    dx = np.fromiter((r[1] or 0.0 for r in rows), np.float64, n)
+    dy = np.fromiter((r[2] or 0.0 for r in rows), np.float64, n)
+    auto = np.fromiter((r[3] or 0 for r in rows), np.int64, n)
+    final = np.fromiter((-1 if r[4] is None else r[4] for r in rows), np.int64, n)
+    has_revision = np.fromiter((bool(r[5]) for r in rows), bool, n)
+
+    revised = has_revision | ((final >= 0) & (final != auto))
+    new = score_offsets(dx, dy)["score"]
+    changed = (new != auto) & ~revised
+
+    params = [{"id": int(i), "score": int(s)} for i, s in zip(ids[changed], new[changed])]
+    image_ids = {rows[k][6] for k in np.flatnonzero(changed)}
+    return params, image_ids, int((revised & (new != auto)).sum())
+
+
+def rescore_shots(engine, chunk_size=CHUNK_SIZE, state_path=STATE_PATH, restart=False, dry_run=False, progress=None):
+    """Re-score all shots; returns the final state dict. `progress(state, total)` is called after each chunk."""
+    fingerprint = geometry_fingerprint()
+    state = fresh_state(fingerprint) if restart else load_state(state_path, fingerprint)
+
+    with engine.connect() as conn:
+        total = state["scanned"] + conn.execute(
+            text("SELECT COUNT(*) FROM shots WHERE id > :last_id"), {"last_id": state["last_id"]}
+        ).scalar()
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(SELECT_CHUNK, {"last_id": state["last_id"], "limit": chunk_size}).fetchall()
+            if not rows:
+                break
+
+            params, image_ids, skipped = rescore_chunk(rows)
+            if params and not dry_run:
+                conn.execute(UPDATE_SHOT, params)
+                # Raw UPDATEs bypass the ORM listeners, so refresh the denormalized totals here
+                refresh_score_totals(conn, image_ids)
+                refresh_rollups(conn, image_ids)
+                bump_analytics_generation(conn)
+
+        state["last_id"] = rows[-1][0]
+        state["scanned"] += len(rows)
+        state["updated"] += len(params)
+        state["skipped_revised"] += skipped
+        if not dry_run:
+            save_state(state_path, state)
+        if progress:
+            progress(state, total)
+
+    state["finished"] = True
+    if not dry_run:
+        save_state(state_path, state)
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score stored shots with the current target geometry.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--state", default=STATE_PATH, help="checkpoint file used to resume")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first shot")
+    parser.add_argument("--dry-run", action="store_true", help="count changes without writing")
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from models import db
+
+    started = time.time()
+
+    def report(state, total):
+        elapsed = max(time.time() - started, 1e-6)
+        print(
+            f"\r{state['scanned']}/{total} shots scanned, {state['updated']} updated, "
+            f"{state['skipped_revised']} revised kept ({state['scanned'] / elapsed:.0f}/s)",
+            end="",
+            file=sys.stderr,
+        )
+
+    app = create_app()
+    with app.app_context():
+        state = rescore_shots(
+            db.engine,
+            chunk_size=args.chunk_size,
+            state_path=args.state,
+            restart=args.restart,
+            dry_run=args.dry_run,
+            progress=report,
+        )
+    print(file=sys.stderr)
+    print(json.dumps(state, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import (
+    MODEL_ID,
+    CONF_THRESHOLD,
+    ISSF_RADII_MM,
+    BULLET_RADIUS_MM,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_PATH,
+    RESULT_CACHE_MAX_BYTES,
+)
+
+# ============================================================
+# CONTENT-ADDRESSED SCORING CACHE
+# ============================================================
+
+# Bump when the cached payload layout changes
+CACHE_FORMAT = 1
+
+
+def config_fingerprint() -> str:
+    """Everything besides the image bytes that changes what score_image() computes."""
+    parts = {
+        "format": CACHE_FORMAT,
+        "model": MODEL_ID,
+        "conf": CONF_THRESHOLD,
+        "radii": sorted(ISSF_RADII_MM.items()),
+        "bullet": BULLET_RADIUS_MM,
+    }
+    return json.dumps(parts, sort_keys=True)
+
+
+class ResultCache:
+    """
+    SQLite-backed map of sha256(image bytes + config) -> scoring geometry.
+
+    Entries are evicted least-recently-used once the stored payloads exceed
+    `max_bytes`. Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, max_bytes, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+        self._fingerprint = config_fingerprint().encode("utf-8")
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        if not self._ready:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS results ("
+                        " key TEXT PRIMARY KEY,"
+                        " value TEXT NOT NULL,"
+                        " size INTEGER NOT NULL,"
+                        " last_used REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS ix_results_last_used ON results (last_used)")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def key_for(self, data: bytes) -> str:
+        h = hashlib.sha256(self._fingerprint)
+        h.update(data)
+        return h.hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        finally:
+            conn.close()
+        with self._lock:
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        payload = json.dumps(value)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM results")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        finally:
+            conn.close()
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+result_cache = ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_MAX_BYTES, enabled=RESULT_CACHE_ENABLED)
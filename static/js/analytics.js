@@ -63,6 +63,59 @@
 
   const el = (id) => document.getElementById(id);
 
+  // Incremented per loadAnalytics() call so late responses from older filters are ignored
+  let loadSeq = 0;
+
+  // Extra query parameters per section endpoint
+  const SECTION_PARAMS = {
+    time_series: '&format=binary',
+    scatter: '&sample=grid&format=columnar&max_points=1100',
+    sparklines: '&format=columnar'
+  };
+
+  // Binary time series (see _binary_time_series): uint32 header length, JSON header,
+  // padding to 8 bytes, float64 timestamps, then float32 scores; little-endian
+  function decodeTimeSeriesBinary(buffer) {
+    const view = new DataView(buffer);
+    const headerLength = view.getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+    const offset = Math.ceil((4 + headerLength) / 8) * 8;
+    const counts = [header.overall, ...header.series.map((s) => s.n)];
+    const total = counts.reduce((a, b) => a + b, 0);
+    const times = new Float64Array(buffer, offset, total);
+    const scores = new Float32Array(buffer, offset + 8 * total, total);
+
+    let start = 0;
+    const runs = counts.map((n) => {
+      const points = [];
+      for (let i = start; i < start + n; i += 1) points.push([times[i], scores[i]]);
+      start += n;
+      return points;
+    });
+    return {
+      series: header.series.map((s, i) => ({ id: s.id, name: s.name, data: runs[i + 1] })),
+      overall: runs[0],
+      best_point: header.best_point,
+      worst_point: header.worst_point
+    };
+  }
+
+  function decodeColumnarSparklines(payload) {
+    return payload.session_id.map((sessionId, i) => ({
+      session_id: sessionId,
+      name: payload.name[i],
+      mode: payload.mode[i],
+      updated_at: payload.updated_at[i],
+      data: payload.data[i]
+    }));
+  }
+
+  // Turn compact section encodings back into the shapes the renderers take
+  const DECODERS = {
+    time_series: decodeTimeSeriesBinary,
+    sparklines: decodeColumnarSparklines
+  };
+
   function toParams(payload) {
     const params = new URLSearchParams();
     if (payload.start) params.set('start', payload.start);
@@ -355,24 +408,30 @@
     });
   }
 
+  // Scatter arrives grid-binned in columnar form: one bubble per (score, distance) cell sized by shot count
   function renderScatterChart(payload) {
+    const data = payload.x.map((x, i) => ({ x, y: payload.y[i], z: payload.count[i] }));
+
     charts.scatter = Highcharts.chart('chartScatter', {
-      chart: { type: 'scatter', zoomType: 'xy', panning: true, panKey: 'shift' },
+      chart: { type: 'bubble', zoomType: 'xy', panning: true, panKey: 'shift' },
       title: { text: null },
+      subtitle: { text: `${payload.total} shots` },
       xAxis: { title: { text: 'Shot Score' }, min: 0, max: 10 },
       yAxis: { title: { text: 'Distance from center (mm)' } },
       tooltip: {
         formatter: function () {
           const p = this.point;
-          return `<b>${p.athlete}</b><br/>Score: ${p.x}<br/>Distance: ${p.y.toFixed(2)} mm<br/>Mode: ${p.mode}`;
+          return `Score: ${p.x}<br/>Distance: ${p.y.toFixed(2)} mm<br/>Shots: ${p.z}`;
         }
       },
+      plotOptions: {
+        bubble: { minSize: 3, maxSize: 24 }
+      },
       exporting: { enabled: true },
       series: [{
         name: 'Shots',
-        data: payload,
-        color: 'rgba(13,110,253,0.55)',
-        marker: { radius: 3 }
+        data,
+        color: 'rgba(13,110,253,0.55)'
       }]
     });
   }
@@ -562,19 +621,35 @@
     saveStateToStorage(payload);
     applyStateToUrl(payload);
 
-    const res = await fetch(`/analytics/data?${toParams(payload)}`);
-    const data = await res.json();
+    const query = toParams(payload);
+    const load = ++loadSeq;
+
+    const fetchSection = (name) => fetch(`/analytics/data/${name}?${query}${SECTION_PARAMS[name] || ''}`).then((res) => {
+      if (!res.ok) throw new Error(`${name}: HTTP ${res.status}`);
+      const binary = (res.headers.get('Content-Type') || '').startsWith('application/octet-stream');
+      return binary ? res.arrayBuffer() : res.json();
+    }).then((payload) => (DECODERS[name] ? DECODERS[name](payload) : payload));
+
+    // Each chart renders as soon as its sections arrive; results of a superseded load are dropped
+    const render = (names, fn) => Promise.all(names.map(fetchSection)).then((parts) => {
+      if (load === loadSeq) fn(...parts);
+    });
 
-    renderSummary(data.summary, data.training_vs_competition);
-    renderPerformanceChart(data.time_series);
-    renderComparisonChart(data.comparison);
-    renderTeamChart(data.team);
-    renderScatterChart(data.distribution.scatter);
-    renderHeatmap(data.distribution.heatmap);
-    renderSeriesChart(data.series_analysis);
-    renderConsistency(data.consistency);
-    renderSparklines(data.sparklines);
-    renderAthleteTable(data.comparison);
+    const results = await Promise.allSettled([
+      render(['summary', 'training_vs_competition'], renderSummary),
+      render(['time_series'], renderPerformanceChart),
+      render(['comparison'], (comparison) => {
+        renderComparisonChart(comparison);
+        renderAthleteTable(comparison);
+      }),
+      render(['team'], renderTeamChart),
+      render(['scatter'], renderScatterChart),
+      render(['heatmap'], renderHeatmap),
+      render(['series_analysis'], renderSeriesChart),
+      render(['consistency'], renderConsistency),
+      render(['sparklines'], renderSparklines)
+    ]);
+    results.filter((r) => r.status === 'rejected').forEach((r) => console.error(r.reason));
   }
 
   function bindRealtimeUpdates() {
@@ -341,27 +341,18 @@ processBtn.onclick = async () => {
     processBtn.innerHTML = '<span class="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span>Обробляється';
 
     try {
-        const res = await fetch("/process", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ filename: currentFile })
-        });
+        const data = await window.scoringJobs.processImage(currentFile);
 
-        const data = await res.json();
-        if (res.ok) {
-            shots.innerText = data.stats.shots;
-            total.innerText = data.stats.total_score;
+        shots.innerText = data.stats.shots;
+        total.innerText = data.stats.total_score;
 
-            baseImg.src = data.images.overlay;
-            idealImg.src = data.images.ideal;
-            scoredImg.src = data.images.scored;
+        baseImg.src = data.images.overlay;
+        idealImg.src = data.images.ideal;
+        scoredImg.src = data.images.scored;
 
-            jsonOut.textContent = JSON.stringify(data.json, null, 2);
-            
-            showToast('Обробка завершена успішно!', 'success');
-        } else {
-            alert('Помилка обробки: ' + data.error);
-        }
+        jsonOut.textContent = JSON.stringify(data.json, null, 2);
+        
+        showToast('Обробка завершена успішно!', 'success');
     } catch (error) {
         console.error("Processing error:", error);
         alert('Помилка обробки: ' + error.message);
@@ -0,0 +1,67 @@
+// Background scoring jobs: submit to /process asynchronously and wait for the result
+
+(function () {
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+    // Submit, retrying while the server reports a full queue (503 + Retry-After)
+    async function submitJob(filename, attempts = 10) {
+        for (let i = 0; i < attempts; i++) {
+            const res = await fetch('/process', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ filename, async: true })
+            });
+            const data = await res.json();
+            if (res.status !== 503) {
+                if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+                return data;
+            }
+            const retry = parseFloat(res.headers.get('Retry-After')) || 2;
+            await sleep(retry * 1000);
+        }
+        throw new Error('Processing queue is busy, please try again');
+    }
+
+    function waitWithEvents(job) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(job.events_url);
+            const finish = ev => {
+                source.close();
+                resolve(JSON.parse(ev.data));
+            };
+            source.addEventListener('done', finish);
+            source.addEventListener('failed', finish);
+            source.onerror = () => {
+                source.close();
+                reject(new Error('event stream closed'));
+            };
+        });
+    }
+
+    async function waitWithPolling(job, intervalMs = 1000) {
+        for (;;) {
+            const res = await fetch(job.status_url);
+            const data = await res.json();
+            if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+            if (data.status === 'done' || data.status === 'failed') return data;
+            await sleep(intervalMs);
+        }
+    }
+
+    // Resolves with the same payload the synchronous /process returns
+    async function processImage(filename) {
+        const job = await submitJob(filename);
+
+        let final;
+        try {
+            final = window.EventSource ? await waitWithEvents(job) : await waitWithPolling(job);
+        } catch (error) {
+            final = await waitWithPolling(job);
+        }
+
+        if (final.status === 'failed') throw new Error(final.error || 'Processing failed');
+        return final.result;
+    }
+
+    window.scoringJobs = { processImage };
+})();
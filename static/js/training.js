@@ -250,9 +250,10 @@
   }
 
   async function processAndSave(filename){
-    const r = await fetch('/process', {method:'POST', headers:{'content-type':'application/json'}, body: JSON.stringify({filename})});
-    const j = await r.json();
-    if(j.error){ $id('upload-feedback').textContent = j.error; return; }
+    let j;
+    try{
+      j = await window.scoringJobs.processImage(filename);
+    } catch(err){ $id('upload-feedback').textContent = err.message; return; }
 
     // Save into training (use the full result object)
     const resultObj = (j && j.json) ? j.json : j;
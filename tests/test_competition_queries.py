@@ -0,0 +1,86 @@
+"""The competition pages load their whole tree in a fixed number of queries (no N+1)."""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from models import Athlete, Exercise, Image, Jacket, Rifle, Scope, Series, bulk_insert_shots, db
+
+# Statements per request, independent of how many athletes/series/images/shots there are
+MAX_RESULTS_QUERIES = 5
+MAX_MANAGE_QUERIES = 5
+
+
+def seed_competition(client, athletes, images_per_series=2, shots_per_image=5):
+    client.get("/competition/")  # creates the system exercises
+
+    scope = Scope(name="scope")
+    rifle = Rifle(name="rifle", scope=scope)
+    jacket = Jacket(name="jacket")
+    people = [Athlete(first_name=f"A{n}", gender="m", rifle=rifle, jacket=jacket) for n in range(athletes)]
+    db.session.add_all([scope, rifle, jacket, *people])
+    db.session.commit()
+
+    exercise = Exercise.query.filter_by(is_system=True).first()
+    response = client.post(
+        "/competition/create",
+        json={"name": "cup", "exercise_id": exercise.id, "athlete_ids": [a.id for a in people]},
+    )
+    competition_id = response.get_json()["competition"]["id"]
+
+    for series in Series.query.all():
+        for n in range(images_per_series):
+            image = Image(
+                filename=f"s{series.id}_{n}.jpg",
+                original_path=f"/static/uploads/s{series.id}_{n}.jpg",
+                athlete_id=series.competition_athlete.athlete_id,
+                series_id=series.id,
+            )
+            db.session.add(image)
+            db.session.flush()
+            shots = [{"id": k + 1, "center_px": [k, k], "dist_mm": k, "score": 10 - k} for k in range(shots_per_image)]
+            bulk_insert_shots(db.session, image, shots)
+    db.session.commit()
+    return competition_id
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def queries_for(client, url):
+    db.session.remove()  # start from an empty identity map, like a fresh request
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "url, bound",
+    [
+        ("/competition/competitions/{id}/results", MAX_RESULTS_QUERIES),
+        ("/competition/{id}", MAX_MANAGE_QUERIES),
+    ],
+)
+def test_competition_page_query_count_is_bounded(app, client, url, bound):
+    with app.app_context():
+        small = seed_competition(client, athletes=2)
+        large = seed_competition(client, athletes=6)
+
+        small_count = queries_for(client, url.format(id=small))
+        large_count = queries_for(client, url.format(id=large))
+
+    assert large_count == small_count
+    assert large_count <= bound
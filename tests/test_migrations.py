@@ -0,0 +1,91 @@
+"""Upgrading a database created by the pre-versioning releases."""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from migrations import LATEST_VERSION, current_version, migrate
+from models import rebuild_rollups
+
+# Tables as the first releases created them; everything else was added by ALTER TABLE later
+LEGACY_SCHEMA = """
+CREATE TABLE athletes (id INTEGER PRIMARY KEY, first_name VARCHAR(100) NOT NULL);
+CREATE TABLE sessions (id INTEGER PRIMARY KEY);
+CREATE TABLE images (
+    id INTEGER PRIMARY KEY,
+    filename VARCHAR(250) NOT NULL,
+    original_path VARCHAR(500) NOT NULL,
+    session_id INTEGER NOT NULL REFERENCES sessions(id)
+);
+CREATE TABLE shots (id INTEGER PRIMARY KEY, image_id INTEGER NOT NULL REFERENCES images(id), shot_index INTEGER);
+CREATE TABLE shot_revisions (id INTEGER PRIMARY KEY, shot_id INTEGER NOT NULL REFERENCES shots(id));
+CREATE TABLE exercises (
+    id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, description TEXT,
+    total_series INTEGER NOT NULL, shots_per_series INTEGER NOT NULL,
+    timing_type VARCHAR(20) NOT NULL DEFAULT 'fixed', is_system BOOLEAN NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE competitions (
+    id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, status VARCHAR(20) NOT NULL DEFAULT 'draft',
+    started_at DATETIME, finished_at DATETIME, created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id)
+);
+CREATE TABLE competition_athletes (
+    id INTEGER PRIMARY KEY,
+    competition_id INTEGER NOT NULL REFERENCES competitions(id),
+    athlete_id INTEGER NOT NULL REFERENCES athletes(id)
+);
+CREATE TABLE series (
+    id INTEGER PRIMARY KEY, series_number INTEGER NOT NULL, status VARCHAR(20) NOT NULL DEFAULT 'active',
+    started_at DATETIME, finished_at DATETIME, created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    competition_athlete_id INTEGER NOT NULL REFERENCES competition_athletes(id)
+);
+
+INSERT INTO athletes (id, first_name) VALUES (1, 'Anna');
+INSERT INTO sessions (id) VALUES (1);
+INSERT INTO images (id, filename, original_path, session_id) VALUES
+    (1, 'a.jpg', '/static/uploads/a.jpg', 1),
+    (2, 'b.jpg', '/static/uploads/b.jpg', 1);
+INSERT INTO shots (id, image_id, shot_index) VALUES (1, 1, 1), (2, 1, 2), (3, 2, 1);
+INSERT INTO exercises (id, name, total_series, shots_per_series) VALUES (1, 'GP-11', 2, 20);
+INSERT INTO competitions (id, name, exercise_id) VALUES (1, 'Cup', 1);
+INSERT INTO competition_athletes (id, competition_id, athlete_id) VALUES (1, 1, 1);
+INSERT INTO series (id, series_number, competition_athlete_id) VALUES (1, 1, 1), (2, 2, 1);
+"""
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+
+
+def test_legacy_database_migrates_to_latest(legacy_engine):
+    assert migrate(legacy_engine) == 0
+
+    with legacy_engine.connect() as conn:
+        assert current_version(conn) == LATEST_VERSION
+        assert conn.exec_driver_sql("SELECT idx FROM shots ORDER BY id").scalars().all() == [1, 2, 1]
+        series_sessions = conn.exec_driver_sql("SELECT session_id FROM series ORDER BY id").scalars().all()
+        assert len(set(series_sessions)) == 2 and 0 not in series_sessions
+
+        for tbl, col in (("images", "created_at"), ("shots", "created_at"), ("sessions", "started_at")):
+            assert conn.exec_driver_sql(f"SELECT COUNT(*) FROM {tbl} WHERE {col} IS NULL").scalar() == 0
+        # Both legacy images are counted once their timestamps are backfilled
+        assert conn.exec_driver_sql("SELECT SUM(attempts), SUM(shots) FROM athlete_day_stats").one() == (2, 3)
+
+
+def test_rollups_skip_images_without_timestamp(legacy_engine):
+    migrate(legacy_engine)
+
+    with legacy_engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE images SET created_at = NULL WHERE id = 2")
+        rebuild_rollups(conn)
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM athlete_day_stats WHERE day IS NULL").scalar() == 0
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
-from models import db, Session, Image, Shot, ShotRevision, Athlete
+from models import db, Session, Image, Shot, ShotRevision, Athlete, bulk_insert_shots
 import os
 import json
 
@@ -60,6 +61,8 @@ def session_images(session_id):
 
 @training_bp.route("/image/<int:image_id>", methods=["GET"])
 def image_detail(image_id):
+    from scorer import artifact_available
+
     img = Image.query.get_or_404(image_id)
     d = img.to_dict()
     d["shots"] = [s.to_dict() for s in img.shots]
@@ -72,7 +75,8 @@ def image_detail(image_id):
         if not p.startswith('/'):
             p = '/' + p
         fs = os.path.join(current_app.root_path, p.lstrip('/'))
-        return p if os.path.exists(fs) else None
+        # Lazily rendered artifacts do not exist on disk until first requested
+        return p if os.path.exists(fs) or artifact_available(p) else None
 
     for key in ('original_path','overlay_path','scored_path','ideal_path'):
         d[key] = _check_path(d.get(key))
@@ -157,20 +161,7 @@ def save_image_and_shots():
     db.session.flush()  # get id
 
     shots = result.get("shots", [])
-    for s in shots:
-        shot = Shot(
-            shot_index=s.get("id"),
-            center_px=s.get("center_px"),
-            dx_mm=s.get("dx_mm"),
-            dy_mm=s.get("dy_mm"),
-            dist_mm=s.get("dist_mm"),
-            bullet_radius_px=s.get("bullet_radius_px"),
-            auto_score=s.get("score"),
-            final_score=s.get("score"),
-            metadata_json=s,
-            image=img,
-        )
-        db.session.add(shot)
+    bulk_insert_shots(db.session, img, shots)
 
     db.session.commit()
 
@@ -243,9 +234,23 @@ def api_sessions():
     total = q.count()
     items = q.offset((page - 1) * per_page).limit(per_page).all()
 
+    # One aggregate query over the denormalized image totals for the sessions on this page
+    totals = {}
+    if items:
+        rows = (
+            db.session.query(
+                Image.session_id,
+                func.coalesce(func.sum(Image.cached_shots_count), 0),
+                func.coalesce(func.sum(Image.cached_total_score), 0),
+            )
+            .filter(Image.session_id.in_([s.id for s in items]))
+            .group_by(Image.session_id)
+            .all()
+        )
+        totals = {sid: (int(shots), int(score)) for sid, shots, score in rows}
+
     def s_to_dict(s: Session):
-        total_shots = sum(img.shots_count() for img in s.images)
-        total_score = sum(img.total_score() for img in s.images)
+        total_shots, total_score = totals.get(s.id, (0, 0))
         return {
             'id': s.id,
             'name': s.name,
@@ -312,6 +317,11 @@ def edit_shot(shot_id):
     db.session.add(rev)
     db.session.commit()
 
+    # Scored/ideal images show the score; redraw them with the corrected value on next view
+    from scorer import invalidate_artifacts
+
+    invalidate_artifacts(shot.image.filename, {shot.shot_index: shot.final_score})
+
     return jsonify({"ok": True, "shot": shot.to_dict()})
 
 